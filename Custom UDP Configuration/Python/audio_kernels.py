@@ -0,0 +1,154 @@
+"""
+Audio Sample Kernels
+
+Per-frame sample loops and arrival statistics used by the receiver's
+hot paths.
+
+- s16_to_f32: decoded int16 PCM -> float32 [-1, 1) into a preallocated buffer
+- fade_conceal: fade the last good frame to zero into outdata using a
+  precomputed envelope (see fade_envelope)
+- ring_read: copy consecutive ring-buffer frames into outdata, resuming a
+  partly played frame, in one call from the audio callback
+- interval_jitter: mean absolute deviation of arrival intervals in a
+  timestamp ring
+
+Compiled with Numba when it is installed (pip install numba); otherwise the
+same functions fall back to in-place NumPy operations.
+"""
+
+import numpy as np
+
+# Optional JIT compilation
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    njit = None
+    NUMBA_AVAILABLE = False
+
+# Symmetric int16 -> [-1, 1) scale, kept float32 so no loop is upcast to float64
+PCM_SCALE = np.float32(1.0 / 32768.0)
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, fastmath=True, boundscheck=False)
+    def s16_to_f32(src, dst):
+        """Convert int16 samples in src to float32 in dst (same length)"""
+        for i in range(src.shape[0]):
+            dst[i] = np.float32(src[i]) * PCM_SCALE
+
+    @njit(cache=True, fastmath=True, boundscheck=False)
+    def fade_conceal(last_frame, out, envelope):
+        """Write last_frame scaled by envelope into out, silence after it"""
+        n = min(out.shape[0], last_frame.shape[0], envelope.shape[0])
+        for i in range(n):
+            gain = envelope[i]
+            for c in range(out.shape[1]):
+                out[i, c] = last_frame[i, c] * gain
+        for i in range(n, out.shape[0]):
+            for c in range(out.shape[1]):
+                out[i, c] = 0.0
+
+    @njit(cache=True, boundscheck=False)
+    def ring_read(buffer, read_index, write_index, capacity, offset, out):
+        """Fill out from buffer[read_index % slots, offset:] onwards; return (read_index, offset, filled)"""
+        slots = buffer.shape[0]
+        frame = buffer.shape[1]
+        filled = 0
+        while filled < out.shape[0]:
+            available = write_index - read_index
+            if available <= 0:
+                break
+            if available > capacity:
+                # Producer lapped the reader: skip to the oldest frame still intact
+                read_index = write_index - capacity
+                offset = 0
+            slot = read_index % slots
+            count = min(frame - offset, out.shape[0] - filled)
+            for i in range(count):
+                for c in range(out.shape[1]):
+                    out[filled + i, c] = buffer[slot, offset + i, c]
+            filled += count
+            if offset + count == frame:
+                read_index += 1
+                offset = 0
+            else:
+                offset += count
+        return read_index, offset, filled
+
+    # Explicit signature compiles at import instead of on the first adaptation
+    @njit('float64(float64[::1], int64)', cache=True, fastmath=True)
+    def interval_jitter(timestamps, count):
+        """Mean |interval - mean interval| over the last min(count, size) ring entries"""
+        size = timestamps.shape[0]
+        n = min(count, size)
+        if n < 3:
+            return 0.0
+        start = count - n
+        total = 0.0
+        for k in range(1, n):
+            total += timestamps[(start + k) % size] - timestamps[(start + k - 1) % size]
+        mean = total / (n - 1)
+        deviation = 0.0
+        for k in range(1, n):
+            interval = timestamps[(start + k) % size] - timestamps[(start + k - 1) % size]
+            deviation += abs(interval - mean)
+        return deviation / (n - 1)
+else:
+    def s16_to_f32(src, dst):
+        """Convert int16 samples in src to float32 in dst (same length)"""
+        np.multiply(src, PCM_SCALE, out=dst, dtype=np.float32, casting='unsafe')
+
+    def fade_conceal(last_frame, out, envelope):
+        """Write last_frame scaled by envelope into out, silence after it"""
+        n = min(out.shape[0], last_frame.shape[0], envelope.shape[0])
+        np.multiply(last_frame[:n], envelope[:n, None], out=out[:n])
+        out[n:] = 0.0
+
+    def ring_read(buffer, read_index, write_index, capacity, offset, out):
+        """Fill out from buffer[read_index % slots, offset:] onwards; return (read_index, offset, filled)"""
+        slots, frame = buffer.shape[0], buffer.shape[1]
+        filled = 0
+        while filled < len(out):
+            available = write_index - read_index
+            if available <= 0:
+                break
+            if available > capacity:
+                # Producer lapped the reader: skip to the oldest frame still intact
+                read_index = write_index - capacity
+                offset = 0
+            count = min(frame - offset, len(out) - filled)
+            out[filled:filled + count] = buffer[read_index % slots, offset:offset + count]
+            filled += count
+            if offset + count == frame:
+                read_index += 1
+                offset = 0
+            else:
+                offset += count
+        return read_index, offset, filled
+
+    def interval_jitter(timestamps, count):
+        """Mean |interval - mean interval| over the last min(count, size) ring entries"""
+        size = timestamps.shape[0]
+        n = min(count, size)
+        if n < 3:
+            return 0.0
+        ordered = np.roll(timestamps, -(count % size))[size - n:]  # Oldest first
+        intervals = np.diff(ordered)
+        return float(np.fabs(intervals - intervals.mean()).mean())
+
+
+def fade_envelope(frame_samples, start_gain=0.3):
+    """Linear start_gain -> 0 gain ramp for fade_conceal, built once at startup"""
+    return np.linspace(start_gain, 0.0, frame_samples, dtype=np.float32)
+
+
+def warmup(frame_samples, channels):
+    """Compile the kernels up front so the first call never lands in the audio callback"""
+    s16_to_f32(np.zeros(frame_samples * channels, dtype=np.int16),
+               np.zeros(frame_samples * channels, dtype=np.float32))
+    fade_conceal(np.zeros((frame_samples, channels), dtype=np.float32),
+                 np.zeros((frame_samples, channels), dtype=np.float32),
+                 fade_envelope(frame_samples))
+    ring_read(np.zeros((2, frame_samples, channels), dtype=np.float32), 0, 1, 1, 0,
+              np.zeros((frame_samples, channels), dtype=np.float32))
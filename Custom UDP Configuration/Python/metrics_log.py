@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Binary Metrics Log
+
+Fixed-size binary records for the sender's metrics rows, written by its
+logger thread instead of CSV text when logging.sender_log_format is
+"binary", and converted to CSV on demand:
+
+    python metrics_log.py sender_metrics.bin [sender_metrics.csv]
+
+File layout: MAGIC once, then tagged records.
+- SESSION_TAG + uint16 length + JSON list of the per-session constants
+  (session_start, target_ip, target_port, sample_rate, channels,
+  opus_bitrate, frame_duration); written whenever they change
+- METRICS_TAG + METRICS_RECORD: time_ns plus the per-row counters
+
+logger_loop is the logger thread body shared by the sender and receiver.
+"""
+
+import csv
+import functools
+import json
+import queue
+import struct
+import sys
+import time
+
+MAGIC = b'UDPMLOG1'
+SESSION_TAG = b'S'
+METRICS_TAG = b'M'
+_SESSION_LEN = struct.Struct('<H')
+
+# time_ns, packet_count, elapsed, rate, compression_ratio, raw_bytes, compressed_bytes,
+# packets_sent, send_errors, success_rate, timing_errors, timing_accuracy,
+# buffer_underruns, congestion_events, adaptive_delay_ms, congestion_detected
+METRICS_RECORD = struct.Struct('<QIdddIIIIdIdIId?')
+
+# Positions in the sender's metrics row (see log_enhanced_metrics)
+_SESSION_FIELDS = (0, 7, 8, 9, 10, 11, 12)
+_METRIC_FIELDS = (1, 2, 3, 4, 5, 6, 13, 14, 15, 16, 17, 18, 19, 20, 21)
+_ROW_LENGTH = 22
+
+CSV_HEADERS = [
+    'timestamp', 'session_start', 'packet_count', 'elapsed_time', 'packet_rate',
+    'compression_ratio', 'raw_bytes', 'compressed_bytes', 'target_ip', 'target_port',
+    'sample_rate', 'channels', 'opus_bitrate', 'frame_duration', 'packets_sent',
+    'send_errors', 'success_rate', 'timing_errors', 'timing_accuracy',
+    'buffer_underruns', 'congestion_events', 'adaptive_delay_ms', 'congestion_detected'
+]
+
+
+@functools.lru_cache(maxsize=1)
+def _second_prefix(seconds):
+    """Local 'YYYY-mm-dd HH:MM:SS' for a Unix second (rows in the same second reuse it)"""
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(seconds))
+
+
+def format_timestamp_ms(time_ns):
+    """Local 'YYYY-mm-dd HH:MM:SS.mmm' for a time_ns() value, integer math only"""
+    seconds, ns = divmod(time_ns, 1_000_000_000)
+    return f"{_second_prefix(seconds)}.{ns // 1_000_000:03d}"
+
+
+def logger_loop(log_queue, writer, file_handle, format_row=None):
+    """Logger thread: write queued rows in batches of up to 32 until the None sentinel
+
+    format_row turns each queued item into a writer row (None passes items
+    through, as BinaryMetricsWriter takes them). The file is flushed at most
+    once a second, once the queue has been idle that long, and on shutdown.
+    """
+    last_flush = time.monotonic()
+    dirty = False
+    running = True
+    while running:
+        try:
+            # Block for the first row (bounded while rows await a flush), then take what else is waiting
+            batch = [log_queue.get(timeout=1.0) if dirty else log_queue.get()]
+        except queue.Empty:
+            batch = []
+        while batch and len(batch) < 32:
+            try:
+                batch.append(log_queue.get_nowait())
+            except queue.Empty:
+                break
+        if None in batch:
+            running = False
+            batch = batch[:batch.index(None)]
+
+        try:
+            if batch:
+                writer.writerows(batch if format_row is None else map(format_row, batch))
+                dirty = True
+            now = time.monotonic()
+            if dirty and (now - last_flush >= 1.0 or not batch or not running):
+                file_handle.flush()
+                last_flush = now
+                dirty = False
+        except Exception as e:
+            print(f"Error writing to CSV: {e}")
+
+
+class BinaryMetricsWriter:
+    """Packs queued (time_ns, row) items into a binary file opened 'ab'"""
+
+    def __init__(self, file_handle):
+        self.file = file_handle
+        self._session = None
+        if file_handle.tell() == 0:
+            file_handle.write(MAGIC)
+
+    def writerows(self, items):
+        """Write each item, preceded by a session record when its constants changed"""
+        write = self.file.write
+        pack = METRICS_RECORD.pack
+        for time_ns, row in items:
+            if len(row) < _ROW_LENGTH:
+                row = [*row, *(0,) * (_ROW_LENGTH - len(row))]  # Short rows: no enhanced counters
+            session = [row[i] for i in _SESSION_FIELDS]
+            if session != self._session:
+                self._session = session
+                payload = json.dumps(session).encode('utf-8')
+                write(SESSION_TAG + _SESSION_LEN.pack(len(payload)) + payload)
+            write(METRICS_TAG + pack(time_ns, *(row[i] for i in _METRIC_FIELDS)))
+
+
+def iter_rows(file_handle):
+    """Yield CSV-layout rows (timestamp first) from a binary metrics log"""
+    if file_handle.read(len(MAGIC)) != MAGIC:
+        raise ValueError("not a binary metrics log")
+    session = [None] * len(_SESSION_FIELDS)
+    while True:
+        tag = file_handle.read(1)
+        if not tag:
+            return
+        if tag == SESSION_TAG:
+            (length,) = _SESSION_LEN.unpack(file_handle.read(_SESSION_LEN.size))
+            session = json.loads(file_handle.read(length))
+        elif tag == METRICS_TAG:
+            data = file_handle.read(METRICS_RECORD.size)
+            if len(data) < METRICS_RECORD.size:
+                return  # Truncated final record (crash mid-write)
+            time_ns, *metrics = METRICS_RECORD.unpack(data)
+            row = [None] * _ROW_LENGTH
+            for i, value in zip(_SESSION_FIELDS, session):
+                row[i] = value
+            for i, value in zip(_METRIC_FIELDS, metrics):
+                row[i] = value
+            yield [format_timestamp_ms(time_ns), *row]
+        else:
+            raise ValueError(f"corrupt record tag {tag!r}")
+
+
+def export_csv(log_path, csv_path):
+    """Convert a binary metrics log to CSV; returns the number of rows written"""
+    count = 0
+    with open(log_path, 'rb') as src, open(csv_path, 'w', newline='') as dst:
+        writer = csv.writer(dst)
+        writer.writerow(CSV_HEADERS)
+        for row in iter_rows(src):
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def main():
+    """Command line: export a binary metrics log to CSV"""
+    if len(sys.argv) < 2:
+        print("Usage: python metrics_log.py <metrics.bin> [output.csv]")
+        return 1
+    log_path = sys.argv[1]
+    csv_path = sys.argv[2] if len(sys.argv) > 2 else log_path.rsplit('.', 1)[0] + '.csv'
+    try:
+        count = export_csv(log_path, csv_path)
+    except (OSError, ValueError) as e:
+        print(f"❌ Export failed: {e}")
+        return 1
+    print(f"✅ Exported {count} rows to {csv_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""
+Real-Time Thread Tuning
+
+Per-thread CPU affinity and scheduling priority shared by the sender's
+and receiver's hot threads (audio callbacks, receive loop).
+
+- pin_current_thread: restrict the calling thread to one CPU
+  (Linux sched_setaffinity, Windows SetThreadAffinityMask; macOS has no
+  thread affinity API)
+- boost_current_thread: raise the calling thread to real-time priority
+  (Linux SCHED_FIFO, Windows THREAD_PRIORITY_TIME_CRITICAL)
+
+Both act on the calling thread only, so call them from inside the thread
+to tune, e.g. on the first audio callback.
+"""
+
+import ctypes
+import os
+import sys
+
+THREAD_PRIORITY_TIME_CRITICAL = 15
+
+
+def pin_current_thread(core):
+    """Restrict the calling thread to one CPU; False where the OS has no affinity API (macOS)"""
+    if sys.platform.startswith('linux'):
+        os.sched_setaffinity(0, {core})  # pid 0 = calling thread
+        return True
+    if os.name == 'nt':
+        kernel32 = ctypes.windll.kernel32
+        kernel32.GetCurrentThread.restype = ctypes.c_void_p
+        kernel32.SetThreadAffinityMask.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+        kernel32.SetThreadAffinityMask.restype = ctypes.c_size_t
+        if not kernel32.SetThreadAffinityMask(kernel32.GetCurrentThread(), 1 << core):
+            raise ctypes.WinError()
+        return True
+    return False
+
+
+def boost_current_thread(fifo_priority):
+    """Raise the calling thread to real-time priority; returns the policy set, None where unsupported
+
+    SCHED_FIFO at fifo_priority on Linux (PermissionError without root or
+    CAP_SYS_NICE), THREAD_PRIORITY_TIME_CRITICAL on Windows. macOS is left
+    to the scheduler (CoreAudio already runs its callback thread real-time).
+    """
+    if os.name == 'nt':
+        kernel32 = ctypes.windll.kernel32
+        kernel32.GetCurrentThread.restype = ctypes.c_void_p
+        kernel32.SetThreadPriority.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        if not kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_PRIORITY_TIME_CRITICAL):
+            raise ctypes.WinError()
+        return "TIME_CRITICAL"
+    if sys.platform.startswith('linux'):
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(fifo_priority))
+        return f"SCHED_FIFO {fifo_priority}"
+    return None
@@ -18,10 +18,17 @@ Packet Format Expected:
     opus_length: 4 bytes (unsigned long, network byte order) 
     opus_data: variable length (compressed audio)
 
+XOR parity packets (sender network.fec_group) set FEC_FLAG in opus_length;
+with fec_group enabled here too, a single lost frame per group is rebuilt
+from them (see process_fec_packet).
+
 Optimized for Real-time audio streaming
 """
 
 import socket
+import selectors
+import signal
+import ctypes
 import sounddevice as sd
 import threading
 import time
@@ -31,10 +38,17 @@ import sys
 import json
 import os
 import csv
+import copy
+import functools
 from datetime import datetime
-from collections import deque
 import queue
 
+from udp_batch import create_receiver
+from metrics_log import logger_loop
+from realtime import boost_current_thread, pin_current_thread
+from audio_kernels import (NUMBA_AVAILABLE, fade_conceal, fade_envelope, interval_jitter,
+                           ring_read, s16_to_f32, warmup)
+
 # Optional process optimization
 try:
     import psutil
@@ -43,6 +57,14 @@ except ImportError:
     psutil = None
     PSUTIL_AVAILABLE = False
 
+# Optional fast JSON parsing for the config file
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
 # Try to import opuslib with error handling
 try:
     import opuslib
@@ -52,10 +74,135 @@ except ImportError:
     OPUS_AVAILABLE = False
     print("Warning: opuslib not available. Install with: pip install opuslib")
 
+def bind_opus_decode_float():
+    """Bind libopus opus_decode_float with pointer arguments, or None if unavailable
+
+    Takes a fresh function pointer from opuslib's CDLL so opuslib's own
+    bindings keep their argtypes. Decoding writes float32 PCM directly into
+    a caller-owned buffer instead of returning a new bytes object.
+    """
+    if not OPUS_AVAILABLE:
+        return None
+    try:
+        decode_float = opuslib.api.libopus['opus_decode_float']
+        decode_float.argtypes = (
+            opuslib.api.decoder.DecoderPointer,
+            ctypes.POINTER(ctypes.c_ubyte),  # data (NULL = packet loss concealment)
+            ctypes.c_int32,                  # len
+            ctypes.POINTER(ctypes.c_float),  # pcm out, interleaved
+            ctypes.c_int,                    # frame_size (samples per channel)
+            ctypes.c_int                     # decode_fec
+        )
+        decode_float.restype = ctypes.c_int
+        return decode_float
+    except (AttributeError, OSError):
+        return None
+
+# Packet header: packet_count(4) + timestamp(8) + opus_length(4), network byte order
+_HDR = struct.Struct('!LQL')
+FEC_FLAG = 0x80000000  # opus_length high bit: XOR parity packet
+_FEC_LEN = struct.Struct('!H')  # XOR of the group's payload lengths, first in the parity payload
+MAX_OPUS_PACKET = 1275
+# A packet behind in sequence whose transit time (arrival - sender capture) grew by more
+# than this came from a restarted sender (its capture clock restarted too), not a late one
+RESTART_TRANSIT_JUMP_NS = 1_000_000_000
+
+# Defaults filled in under the user's config.json, key by key
+DEFAULT_CONFIG = {
+    'optimization': {
+        'jitter_buffer_size': 5,
+        'enable_adaptive_bitrate': True,
+        'enable_jitter_buffer': True,
+        'max_retries': 2,
+        'timing_tolerance_ms': 5
+    }
+}
+
+def _deep_merge(dst, src):
+    """Merge src into dst recursively: nested dicts are merged, other values replaced"""
+    for key, value in src.items():
+        if isinstance(value, dict) and isinstance(dst.get(key), dict):
+            _deep_merge(dst[key], value)
+        else:
+            dst[key] = copy.deepcopy(value)
+    return dst
+
+@functools.lru_cache(maxsize=4)
+def _read_config_file(config_file, mtime_ns):
+    """Parse config_file once per modification time (mtime_ns is the cache key)"""
+    with open(config_file, 'rb') as f:
+        return orjson.loads(f.read()) if ORJSON_AVAILABLE else json.load(f)
+
+def parse_cpulist(text):
+    """Expand a sysfs cpulist such as '0-3,8-11' into a set of CPU ids"""
+    cpus = set()
+    for part in text.strip().split(','):
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-')
+            cpus.update(range(int(start), int(end) + 1))
+        else:
+            cpus.add(int(part))
+    return cpus
+
+class AudioRingBuffer:
+    """Lock-free single-producer/single-consumer ring of preallocated float32 frames
+
+    The receive thread is the only writer of write_index and the audio callback
+    the only writer of read_index. Both are plain ints, and a single attribute
+    store is atomic under the GIL, so neither side takes a lock. When the producer
+    laps the consumer, the consumer skips ahead to the newest frames (drop-oldest)
+    on its next read. One spare slot keeps the producer off the frame currently
+    being played only while it stays at most one frame past full between reads;
+    a producer further ahead overwrites that frame mid-play, since only the
+    consumer moves read_index.
+    read_offset (consumer-owned) marks how much of the frame at read_index has
+    already been played.
+    """
+
+    def __init__(self, capacity, frame_samples, channels):
+        self.capacity = capacity
+        self.slots = capacity + 1
+        self.buffer = np.zeros((self.slots, frame_samples, channels), dtype=np.float32)
+        self.write_index = 0
+        self.read_index = 0
+        self.read_offset = 0
+
+    def __len__(self):
+        return max(0, min(self.write_index - self.read_index, self.capacity))
+
+    def is_full(self):
+        """Producer side: True when the next commit will drop the oldest frame"""
+        return self.write_index - self.read_index >= self.capacity
+
+    def write_slot(self):
+        """Producer side: slot the next frame should be written into"""
+        return self.buffer[self.write_index % self.slots]
+
+    def commit(self):
+        """Producer side: publish the frame written into write_slot()"""
+        self.write_index += 1
+
+    def read_into(self, out):
+        """Consumer side: fill out from consecutive frames (compiled kernel), return samples written
+
+        A frame only partly used by one call is resumed by the next, so
+        callback sizes need not match the Opus frame size.
+        """
+        self.read_index, self.read_offset, filled = ring_read(
+            self.buffer, self.read_index, self.write_index, self.capacity, self.read_offset, out)
+        return filled
+
 class UDPReceiver:
     def __init__(self, config_file="config.json"):
         # Load configuration
         self.config = self.load_config(config_file)
+
+        # Logging switches read on every packet/callback, resolved once
+        self._verbose = bool(self.config['logging'].get('verbose', False))
+        self._stats_interval = int(self.config['logging'].get('stats_interval', 100))
+        self._csv_enabled = bool(self.config['logging'].get('enable_csv', True))
         
         # Network configuration
         self.listen_ip = "0.0.0.0"  # Listen on all interfaces
@@ -82,6 +229,7 @@ class UDPReceiver:
             except Exception as e:
                 print(f"Error initializing Opus decoder: {e}")
                 sys.exit(1)
+            self._opus_decode_float = bind_opus_decode_float()
         else:
             print("Error: Opus decoder not available")
             sys.exit(1)
@@ -97,10 +245,18 @@ class UDPReceiver:
         # Control flags
         self.receiving = False
         self.packet_count = 0
-        self.start_time = None        # Audio buffering with thread-safe access (optimized for ultra-low latency and zero underruns)
+        self.start_time = None
+        self.last_audio_time = None  # perf_counter of the previous audio callback
+        self._session_start_iso = None
+
+        # Audio buffering: lock-free SPSC ring shared by receive thread and audio callback
         self.max_queue_size = self.config['audio'].get('buffer_frames', 30)  # Configurable buffer size
-        self.audio_queue = deque(maxlen=self.max_queue_size)  
-        self.queue_lock = threading.Lock()  # Thread synchronization
+        self.audio_ring = AudioRingBuffer(self.max_queue_size, self.frame_samples, self.channels)
+
+        # Compile sample kernels now rather than inside the first audio callback
+        warmup(self.frame_samples, self.channels)
+        if NUMBA_AVAILABLE:
+            print("⚡ Numba audio kernels compiled")
         
         # Buffer management for smooth playback
         self.min_buffer_size = max(3, self.max_queue_size // 6)  # Dynamic minimum based on max size
@@ -126,11 +282,13 @@ class UDPReceiver:
         self.frame_interval = self.frame_duration / 1000.0  # Convert to seconds
         self.timing_precision = 0.001  # 1ms precision target
         self.last_packet_time = 0.0
-        self.packet_timestamps = deque(maxlen=100)  # Track recent packets
+        self.packet_timestamps = np.zeros(100, dtype=np.float64)  # Ring of recent arrival times
+        self.packet_timestamp_count = 0
 
-        # Jitter calculation attributes
-        self.transit_times = []
-        self.jitter = 0.0
+        # Jitter calculation attributes (RFC 3550 only needs the previous transit time)
+        self._prev_transit = None  # ns
+        self._in_order_transit = 0  # ns, transit of the newest in-order packet
+        self.jitter_q4 = 0  # RFC 3550 jitter in ns, scaled by 16
         
         # Adaptive jitter buffer management
         optimization_config = self.config.get('optimization', {})
@@ -144,11 +302,29 @@ class UDPReceiver:
         self.realtime_priority = True
         
         # Packet ordering and loss detection
-        self.expected_sequence = 1
-        self.sequence_buffer = {}  # Out-of-order packet buffer
-        self.max_sequence_gap = 5
+        self.expected_sequence = None  # Synced from the first packet received
+        self.seq_window = 2048  # Duplicate-detection window (power of two)
+        self.seq_seen = [-1] * self.seq_window  # Last sequence number seen in each window slot
+        self.max_sequence_gap = 5  # Most frames concealed per gap
+        
+        # XOR parity recovery (network.fec_group): recent payloads are kept so one lost
+        # frame per group can be rebuilt, then decoded in order or into its concealed slot
+        self.fec_enabled = int(self.config['network'].get('fec_group', 0)) > 0
+        self.fec_window = 64  # Remembered sequence numbers (power of two, > 2 groups)
+        self._fec_seq = [-1] * self.fec_window  # Sequence number held in each slot
+        self._fec_len = [0] * self.fec_window
+        self._fec_ring_index = [-1] * self.fec_window  # Ring frame a lost sequence was concealed into
+        self._fec_store = np.zeros((self.fec_window if self.fec_enabled else 0, MAX_OPUS_PACKET), dtype=np.uint8)
+        self._fec_out = np.zeros(MAX_OPUS_PACKET, dtype=np.uint8)
+        self._fec_prime = np.zeros((self.frame_samples, self.channels), dtype=np.float32)
+        # Separate decoder for frames recovered out of order, so the main decoder's state stays in sequence
+        self._fec_decoder = opuslib.Decoder(fs=self.sample_rate, channels=self.channels) if self.fec_enabled else None
+        self.fec_packets_received = 0
+        self.packets_recovered = 0
           # Audio concealment for lost packets
         self.last_audio_frame = None
+        self._last_frame_buf = np.zeros((self.frame_samples, self.channels), dtype=np.float32)
+        self._fade_env = fade_envelope(self.frame_samples, 0.3)  # Precomputed concealment ramp
         self.concealment_enabled = True
           # Buffer initialization for smooth startup (improved)
         self.buffer_initialized = False
@@ -158,38 +334,40 @@ class UDPReceiver:
         
         # Threading
         self.receive_thread = None
+        self.batch_receiver = None
+        self._kernel_timestamps = False  # network.kernel_timestamps: SO_TIMESTAMPNS arrival times
+        self._rx_core = None  # CPUs chosen by select_cores() when threading.pin_cores is set
+        self._audio_core = None
+        self._audio_thread_pinned = False
+        self._stop_event = threading.Event()  # Set by stop_receiving(); the main thread blocks on it
+        self._selector = None
+        self._wakeup_r = None  # socketpair: stop_receiving() writes a byte to wake the selector
+        self._wakeup_w = None
         
         # CSV logging
         self.csv_file = self.config['logging'].get('csv_file', 'udp_receiver_metrics.csv')
         self.csv_writer = None
         self.csv_file_handle = None
+        self._log_queue = queue.SimpleQueue()  # Metric rows for the logger thread
+        self._message_queue = queue.SimpleQueue()  # Callback-side messages, printed by the receive thread
+        self.log_thread = None
         self.init_csv_logging()
           # Set remaining config values (removed duplicate assignment)
         # max_queue_size already set above based on config
         
-        # Jitter buffer (in packets)
-        jitter_size = self.config.get('optimization', {}).get('jitter_buffer_size', 5)
-        self.jitter_buffer = deque(maxlen=jitter_size)
-        
     def load_config(self, config_file):
         """Load configuration directly from JSON file"""
-        if not os.path.exists(config_file):
+        try:
+            # One stat gives both existence and the cache key
+            user_config = _read_config_file(config_file, os.stat(config_file).st_mtime_ns)
+            # Debug: Check if optimization section exists
+            if 'optimization' not in user_config:
+                print(f"⚠️  Warning: 'optimization' section missing from config. Using defaults.")
+            # Fresh copy per receiver so the cached parse is never mutated
+            config = _deep_merge(copy.deepcopy(DEFAULT_CONFIG), user_config)
+        except FileNotFoundError:
             print(f"Error: config file '{config_file}' not found.")
             sys.exit(1)
-        
-        try:
-            with open(config_file, 'r') as f:
-                config = json.load(f)
-                # Debug: Check if optimization section exists
-                if 'optimization' not in config:
-                    print(f"⚠️  Warning: 'optimization' section missing from config. Using defaults.")
-                    config['optimization'] = {
-                        'jitter_buffer_size': 5,
-                        'enable_adaptive_bitrate': True,
-                        'enable_jitter_buffer': True,
-                        'max_retries': 2,
-                        'timing_tolerance_ms': 5
-                    }
         except Exception as e:
             print(f"❌ Error reading config file: {e}")
             sys.exit(1)
@@ -201,13 +379,14 @@ class UDPReceiver:
             self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
             
             # Set socket options
-            buffer_size = self.config['network']['socket_buffer_size']
-            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, buffer_size)
+            self.set_receive_buffer()
             self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             
             # Bind to port
             self.sock.bind((self.listen_ip, self.listen_port))
             print(f"Socket bound to {self.listen_ip}:{self.listen_port}")
+            self.set_socket_priority()
+            self.set_busy_poll()
             
         except Exception as e:
             print(f"Error initializing socket: {e}")
@@ -215,19 +394,87 @@ class UDPReceiver:
                 self.sock.close()
                 self.sock = None
             raise
-    
+
+    def set_receive_buffer(self):
+        """Request a large kernel receive buffer and report what was granted
+
+        A multi-megabyte SO_RCVBUF absorbs scheduling stalls of the receive thread.
+        Linux caps the request at net.core.rmem_max (see BUFFER_OPTIMIZATIONS.md).
+        """
+        requested = self.config['network'].get('receive_buffer_size', 4 * 1024 * 1024)
+
+        # SO_RCVBUFFORCE bypasses rmem_max on Linux when running with CAP_NET_ADMIN
+        force_opt = getattr(socket, 'SO_RCVBUFFORCE', 33 if sys.platform.startswith('linux') else None)
+        forced = False
+        if force_opt is not None:
+            try:
+                self.sock.setsockopt(socket.SOL_SOCKET, force_opt, requested)
+                forced = True
+            except OSError:
+                pass
+        if not forced:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, requested)
+
+        actual = self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+        # Linux reports double the requested size to account for bookkeeping overhead
+        expected = requested * 2 if sys.platform.startswith('linux') else requested
+        if actual < expected:
+            print(f"⚠️ Receive buffer limited to {actual} bytes (requested {requested}); "
+                  f"raise net.core.rmem_max to avoid drops")
+        else:
+            print(f"Receive buffer: {actual} bytes")
+
+    def set_socket_priority(self):
+        """Queue the stream's packets ahead of bulk traffic in the kernel (Linux SO_PRIORITY)
+
+        Priorities 0-6 need no privileges; 7 requires CAP_NET_ADMIN.
+        """
+        if not sys.platform.startswith('linux'):
+            return
+        priority = self.config['network'].get('socket_priority', 6)
+        try:
+            self.sock.setsockopt(socket.SOL_SOCKET, getattr(socket, 'SO_PRIORITY', 12), priority)
+            print(f"✅ Socket priority {priority}")
+        except OSError as e:
+            print(f"⚠️ Could not set socket priority {priority}: {e}")
+
+    def set_incoming_cpu(self, cpu):
+        """Ask the kernel to process this socket's packets on cpu (Linux SO_INCOMING_CPU)"""
+        try:
+            self.sock.setsockopt(socket.SOL_SOCKET, getattr(socket, 'SO_INCOMING_CPU', 49), cpu)
+        except OSError as e:
+            print(f"⚠️ Could not set SO_INCOMING_CPU: {e}")
+
+    def set_busy_poll(self):
+        """Opt-in Linux busy polling (network.busy_poll_us)
+
+        The kernel spins on the NIC queue for up to busy_poll_us before sleeping,
+        so recv skips the interrupt/softirq wakeup. Needs net.core.busy_read (or
+        busy_poll) to be nonzero and usually CAP_NET_ADMIN.
+        """
+        busy_poll_us = self.config['network'].get('busy_poll_us', 0)
+        if not busy_poll_us or not sys.platform.startswith('linux'):
+            return
+
+        try:
+            self.sock.setsockopt(socket.SOL_SOCKET, getattr(socket, 'SO_BUSY_POLL', 46), busy_poll_us)
+            print(f"✅ Busy polling: {busy_poll_us}µs")
+        except OSError as e:
+            print(f"⚠️ Could not enable busy polling (requires CAP_NET_ADMIN): {e}")
+
     def init_csv_logging(self):
         """Initialize CSV logging"""
         # CSV logging disabled to prevent zero_loss_metrics.csv creation
         return
         
-        if not self.config['logging']['enable_csv']:
+        if not self._csv_enabled:
             return
             
         try:
             file_exists = os.path.exists(self.csv_file)
             
-            self.csv_file_handle = open(self.csv_file, 'a', newline='', encoding='utf-8')
+            # 64 KiB buffer: rows reach disk in large writes, not one syscall per row
+            self.csv_file_handle = open(self.csv_file, 'a', newline='', encoding='utf-8', buffering=1 << 16)
             self.csv_writer = csv.writer(self.csv_file_handle)
             
             if not file_exists:
@@ -249,6 +496,12 @@ class UDPReceiver:
                 ]
                 self.csv_writer.writerow(headers)
                 self.csv_file_handle.flush()
+
+            # File I/O happens on its own thread, never on the receive path
+            self.log_thread = threading.Thread(
+                target=logger_loop, daemon=True,
+                args=(self._log_queue, self.csv_writer, self.csv_file_handle, self.format_csv_row))
+            self.log_thread.start()
                 
             print(f"CSV logging enabled: {self.csv_file}")
             
@@ -258,37 +511,41 @@ class UDPReceiver:
             if self.csv_file_handle:
                 try:
                     self.csv_file_handle.close()
-                except:
+                except OSError:
                     pass
                 self.csv_file_handle = None
 
     def log_metrics_to_csv(self, elapsed, rate, loss_rate, queue_size):
-        """Log metrics to CSV file"""
+        """Queue a metrics row for the logger thread (raw values, formatted later)"""
         if not self.csv_writer:
             return
             
-        try:
-            row = [
-                datetime.now().isoformat(),
-                datetime.fromtimestamp(self.start_time).isoformat() if self.start_time else "Unknown",
-                self.packet_count,
-                elapsed,
-                rate,
-                self.lost_packets,
-                loss_rate,
-                self.out_of_order_packets,
-                self.duplicate_packets,
-                self.jitter * 1000,  # Convert to milliseconds
-                queue_size,
-                self.listen_port,
-                self.sample_rate,                self.channels
-            ]
-            self.csv_writer.writerow(row)
-            if self.csv_file_handle:
-                self.csv_file_handle.flush()
-            
-        except Exception as e:
-            print(f"Error writing to CSV: {e}")
+        self._log_queue.put_nowait((
+            time.time_ns(),
+            self.packet_count,
+            elapsed,
+            rate,
+            self.packets_lost,
+            loss_rate,
+            self.packets_late,
+            self.packets_duplicate,
+            self.jitter_q4,
+            queue_size
+        ))
+
+    def format_csv_row(self, item):
+        """Turn one queued metrics tuple into a CSV row"""
+        timestamp_ns, *counters, jitter_q4, queue_size = item
+        return [
+            datetime.fromtimestamp(timestamp_ns / 1e9).isoformat(),
+            self._session_start_iso or "Unknown",
+            *counters,
+            jitter_q4 / 16e6,  # ns x16 -> milliseconds
+            queue_size,
+            self.listen_port,
+            self.sample_rate,
+            self.channels
+        ]
     
     def find_output_device(self, device_id=None):
         """Find best output device"""
@@ -336,281 +593,160 @@ class UDPReceiver:
         self.list_audio_devices()
         return None
 
-    def parse_udp_packet(self, packet):
-        """Parse simple UDP packet: packet_count(4) + timestamp(8) + opus_length(4) + opus_data"""
-        if len(packet) < self.packet_header_size:
-            return None
+    @property
+    def jitter(self):
+        """Current interarrival jitter in seconds"""
+        return self.jitter_q4 / 16e9
+
+    def calculate_jitter(self, udp_timestamp, arrival_ns):
+        """Calculate inter-arrival jitter for UDP packets
+
+        udp_timestamp is the sender's capture time in microseconds and
+        arrival_ns a perf_counter_ns() arrival time; the two clocks are
+        unrelated but both steady, so their offset cancels out.
+        """
+        # Transit time in integer ns, jitter via the RFC 3550 A.8 integer estimator
+        transit = arrival_ns - udp_timestamp * 1000
+        if self._prev_transit is not None:
+            self.jitter_q4 += abs(transit - self._prev_transit) - ((self.jitter_q4 + 8) >> 4)
+        self._prev_transit = transit
+    
+    def make_audio_callback(self):
+        """Build the audio callback with its per-session constants bound as closure locals
+
+        Called by start_receiving() once the stream parameters are fixed, so
+        the 2.7 ms hot path reads cells instead of self attributes for the
+        ring, thresholds, logging switch and concealment buffers.
+        """
+        ring = self.audio_ring
+        read_into = ring.read_into
+        verbose = self._verbose
+        max_queue_size = self.max_queue_size
+        min_buffer_size = self.min_buffer_size
+        target_buffer_size = self.target_buffer_size
+        prefill_buffer_size = self.prefill_buffer_size
+        last_frame = self._last_frame_buf
+        fade_env = self._fade_env
+        track_audio_timing = self.track_audio_timing
+        perf_counter = time.perf_counter
+
+        def audio_callback(outdata, frames, time_info, status):
+            """Enhanced audio playback callback with zero-underrun buffer management"""
+            callback_start = perf_counter()
             
-        # Parse header: packet_count(4) + timestamp(8) + opus_length(4)
-        header = struct.unpack('!LQL', packet[:self.packet_header_size])
-        
-        packet_count = header[0]
-        timestamp = header[1]
-        opus_length = header[2]
-        
-        # Validate opus_length
-        expected_total_length = self.packet_header_size + opus_length
-        if len(packet) != expected_total_length:
-            return None
+            if not self._audio_thread_pinned:
+                self.pin_audio_thread()
+
+            if status and verbose:
+                self.defer_print(f"⚠️ Audio status: {status}")
             
-        opus_data = packet[self.packet_header_size:self.packet_header_size + opus_length]
-        
-        return {
-            'packet_count': packet_count,
-            'timestamp': timestamp,
-            'opus_length': opus_length,
-            'opus_data': opus_data        }
-    
-    def calculate_jitter(self, udp_timestamp, arrival_time):
-        """Calculate inter-arrival jitter for UDP packets"""
-        # Convert UDP timestamp to seconds
-        udp_time_seconds = udp_timestamp / self.sample_rate
-        
-        # Calculate transit time
-        transit = arrival_time - udp_time_seconds
-        self.transit_times.append(transit)
-          # Calculate jitter using standard formula
-        if len(self.transit_times) > 1:
-            d = abs(transit - self.transit_times[-2])
-            self.jitter += (d - self.jitter) / 16.0
-          # Keep only recent transit times
-        if len(self.transit_times) > 100:
-            self.transit_times = self.transit_times[-50:]
-    
-    def audio_callback(self, outdata, frames, time_info, status):
-        """Enhanced audio playback callback with zero-underrun buffer management"""
-        callback_start = time.perf_counter()
-        
-        if status and self.config['logging']['verbose']:
-            print(f"⚠️ Audio status: {status}")
-        
-        outdata.fill(0)  # Zero output buffer initially
-        
-        try:
-            with self.queue_lock:
-                queue_size = len(self.audio_queue)
-                
+            try:
+                queue_size = len(ring)
+
                 # Buffer state management for smooth playback
                 if not self.playback_started:
                     # Wait for buffer pre-fill before starting playback
-                    if queue_size >= self.prefill_buffer_size or self.buffer_prefill_complete:
+                    if queue_size >= prefill_buffer_size or self.buffer_prefill_complete:
                         self.playback_started = True
                         self.buffer_state = "playing"
-                        if self.config['logging']['verbose']:
-                            print(f"🎵 Playback started with {queue_size} frames pre-filled")
+                        if verbose:
+                            self.defer_print(f"🎵 Playback started with {queue_size} frames pre-filled")
                     else:
                         # Still pre-filling, output silence
+                        outdata.fill(0)
                         return
-                
+
                 # Check for buffer recovery
                 if self.buffer_state == "recovering":
-                    if queue_size >= self.target_buffer_size:
+                    if queue_size >= target_buffer_size:
                         self.buffer_state = "playing"
                         self.consecutive_underruns = 0
-                        if self.config['logging']['verbose']:
-                            print(f"✅ Buffer recovered with {queue_size} frames")
-                
-                # Play audio if buffer is healthy
-                if queue_size > 0 and self.buffer_state == "playing":
-                    audio_data = self.audio_queue.popleft()
-                    
-                    # Ensure audio_data is a numpy array
-                    if not isinstance(audio_data, np.ndarray):
-                        if isinstance(audio_data, bytes):
-                            audio_array = np.frombuffer(audio_data, dtype=np.int16)
-                            audio_data = audio_array.astype(np.float32) / 32767.0
-                        else:
-                            return  # Skip invalid data
-                    
-                    # Ensure proper shape for multi-channel audio
-                    if audio_data.ndim == 1:
-                        if self.channels == 2:
-                            audio_data = np.column_stack([audio_data, audio_data])
-                        else:
-                            audio_data = audio_data.reshape(-1, 1)
-                    
-                    samples_to_copy = min(len(audio_data), frames)
-                    outdata[:samples_to_copy] = audio_data[:samples_to_copy]
-                    
+                        if verbose:
+                            self.defer_print(f"✅ Buffer recovered with {queue_size} frames")
+
+                # Play audio if buffer is healthy: stitch as many ring frames as this callback needs
+                filled = read_into(outdata) if self.buffer_state == "playing" else 0
+                if filled:
                     # Update buffer health score
-                    if queue_size >= self.target_buffer_size:
+                    if queue_size >= target_buffer_size:
                         self.buffer_health_score = min(100, self.buffer_health_score + 2)
-                    elif queue_size < self.min_buffer_size:
+                    elif queue_size < min_buffer_size:
                         self.buffer_health_score = max(0, self.buffer_health_score - 5)
-                    
-                    # Store last frame for concealment
-                    self.last_audio_frame = outdata.copy()
-                    
+
+                    # Store last frame for concealment (preallocated, no copy() in the callback)
+                    kept = min(filled, len(last_frame))
+                    last_frame[:kept] = outdata[filled - kept:filled]
+                    self.last_audio_frame = last_frame[:kept]
+
+                    # Ring ran dry partway through: fade the last frame over the remainder
+                    if filled < frames:
+                        if self.concealment_enabled:
+                            fade_conceal(self.last_audio_frame, outdata[filled:], fade_env)
+                        else:
+                            outdata[filled:].fill(0)
+
                 # Handle buffer underrun
                 else:
                     self.buffer_underruns += 1
                     self.consecutive_underruns += 1
-                    
+
                     # Enter recovery mode if too many consecutive underruns
                     if self.consecutive_underruns > 3 and self.buffer_state == "playing":
                         self.buffer_state = "recovering"
-                        if self.config['logging']['verbose']:
-                            print(f"🔄 Entering buffer recovery mode (underruns: {self.consecutive_underruns})")
-                    
+                        if verbose:
+                            self.defer_print(f"🔄 Entering buffer recovery mode (underruns: {self.consecutive_underruns})")
+
                     # Audio concealment for smooth playback during underruns
                     if self.last_audio_frame is not None and self.concealment_enabled:
                         # Advanced concealment with fade-out
-                        fade_samples = min(frames, len(self.last_audio_frame))
-                        fade_factor = np.linspace(0.3, 0.0, fade_samples).reshape(-1, 1)
-                        concealed_audio = self.last_audio_frame[:fade_samples] * fade_factor
-                        outdata[:fade_samples] = concealed_audio
-                    
+                        fade_conceal(self.last_audio_frame, outdata, fade_env)
+                    else:
+                        outdata.fill(0)
+
                     # Reduced logging frequency for underruns
-                    if self.config['logging']['verbose'] and self.buffer_underruns % 100 == 0:
-                        print(f"⚡ Buffer underrun #{self.buffer_underruns}: {queue_size}/{self.max_queue_size} frames (health: {self.buffer_health_score}%)")
-                
+                    if verbose and self.buffer_underruns % 100 == 0:
+                        self.defer_print(f"⚡ Buffer underrun #{self.buffer_underruns}: {queue_size}/{max_queue_size} frames (health: {self.buffer_health_score}%)")
+
                 # Track audio timing precision
-                self.track_audio_timing()
-                
-        except Exception as e:
-            self.audio_glitches += 1
-            if self.config['logging']['verbose']:
-                print(f"❌ Audio callback error #{self.audio_glitches}: {e}")
-        
-        # Track callback performance
-        callback_duration = time.perf_counter() - callback_start
-        if callback_duration > 0.005:  # Warn if callback takes >5ms
-            self.timing_errors += 1
-            if self.config['logging']['verbose'] and self.timing_errors % 50 == 0:
-                print(f"⏱️ Slow audio callback: {callback_duration*1000:.2f}ms")
-    
-    def receive_packets(self):
-        """Receive and process UDP packets"""
-        print(f"Listening for UDP packets on {self.listen_ip}:{self.listen_port}")
-        
-        while self.receiving:
-            try:
-                if not self.sock:
-                    break
-                    
-                # Receive packet
-                packet, addr = self.sock.recvfrom(65536)
-                arrival_time = time.time()
-                  # Parse UDP packet
-                udp_info = self.parse_udp_packet(packet)
-                if not udp_info:
-                    continue
-                
-                # Track packet statistics
-                packet_count = udp_info['packet_count']
-                
-                # Check for duplicates
-                if packet_count in self.received_sequences:
-                    self.duplicate_packets += 1
-                    continue                    
-                self.received_sequences.add(packet_count)
-                
-                # Check for lost packets
-                if self.last_sequence is not None:
-                    expected_sequence = self.last_sequence + 1
-                    if packet_count != expected_sequence:
-                        if packet_count < expected_sequence:
-                            # Out of order packet
-                            self.out_of_order_packets += 1
-                        else:
-                            # Lost packets
-                            lost = packet_count - expected_sequence
-                            self.lost_packets += lost
-                            if self.config['logging']['verbose']:
-                                print(f"Lost {lost} packets (expected {expected_sequence}, got {packet_count})")
-                
-                self.last_sequence = packet_count
-                
-                # Calculate jitter
-                self.calculate_jitter(udp_info['timestamp'], arrival_time)
-                
-                # Decode Opus payload
-                try:
-                    opus_data = udp_info['opus_data']
-                    # Calculate frame size from opus frame duration (default 20ms)
-                    frame_size = int(self.sample_rate * 0.02)  # 20ms frame
-                    pcm_data = self.opus_decoder.decode(opus_data, frame_size=frame_size)
-                    
-                    # Convert to numpy array
-                    audio_array = np.frombuffer(pcm_data, dtype=np.int16)
-                    audio_float = audio_array.astype(np.float32) / 32767.0
-                      # Add to playback queue with improved buffer management
-                    with self.queue_lock:
-                        # Smart buffer management based on current state
-                        if self.buffer_state == "initializing" or self.buffer_state == "recovering":
-                            # During initialization/recovery, fill buffer more aggressively
-                            if len(self.audio_queue) < self.max_queue_size:
-                                self.audio_queue.append(audio_float)
-                                
-                                # Check if we've reached pre-fill threshold
-                                if not self.buffer_prefill_complete and len(self.audio_queue) >= self.prefill_buffer_size:
-                                    self.buffer_prefill_complete = True
-                                    if self.config['logging']['verbose']:
-                                        print(f"✅ Buffer pre-fill complete: {len(self.audio_queue)} frames")
-                            else:
-                                # Buffer full during init - drop oldest
-                                self.audio_queue.popleft()
-                                self.audio_queue.append(audio_float)
-                        else:
-                            # Normal playback - standard buffer management
-                            if len(self.audio_queue) < self.max_queue_size:
-                                self.audio_queue.append(audio_float)
-                            else:
-                                # Drop oldest frame for ultra-low latency
-                                self.audio_queue.popleft()
-                                self.audio_queue.append(audio_float)
-                                self.buffer_overruns += 1
-                            
-                except Exception as e:
-                    if self.config['logging']['verbose']:
-                        print(f"Opus decode error: {e}")
-                    continue
-                
-                self.packet_count += 1
-                
-                # Statistics and logging
-                stats_interval = self.config['logging']['stats_interval']
-                if self.packet_count % stats_interval == 0:
-                    elapsed = time.time() - (self.start_time or time.time())
-                    rate = self.packet_count / elapsed if elapsed > 0 else 0
-                    total_packets = self.packet_count + self.lost_packets
-                    loss_rate = (self.lost_packets / total_packets) * 100 if total_packets > 0 else 0
-                    
-                    with self.queue_lock:
-                        queue_size = len(self.audio_queue)
+                track_audio_timing()
                     
-                    if self.config['logging']['verbose']:
-                        print(f"UDP: {self.packet_count} pkts, {rate:.1f} pkt/s, "
-                              f"loss: {loss_rate:.2f}%, jitter: {self.jitter*1000:.1f}ms, "
-                              f"queue: {queue_size}")
-                    
-                    self.log_metrics_to_csv(elapsed, rate, loss_rate, queue_size)
-                
-                # Clean up old sequence numbers to prevent memory growth
-                if len(self.received_sequences) > 1000:
-                    # Keep only recent sequences
-                    recent_sequences = set()
-                    for seq in self.received_sequences:
-                        if abs(seq - packet_count) < 500:
-                            recent_sequences.add(seq)
-                    self.received_sequences = recent_sequences
-                
-            except socket.timeout:
-                continue
-            except OSError as e:
-                if self.receiving:
-                    print(f"Socket error: {e}")
-                break
             except Exception as e:
-                if self.receiving:
-                    print(f"Error receiving packet: {e}")
-                continue
+                outdata.fill(0)
+                self.audio_glitches += 1
+                if verbose:
+                    self.defer_print(f"❌ Audio callback error #{self.audio_glitches}: {e}")
+            
+            # Track callback performance
+            callback_duration = perf_counter() - callback_start
+            if callback_duration > 0.005:  # Warn if callback takes >5ms
+                self.timing_errors += 1
+                if verbose and self.timing_errors % 50 == 0:
+                    self.defer_print(f"⏱️ Slow audio callback: {callback_duration*1000:.2f}ms")
+
+        return audio_callback
     
+    def is_duplicate(self, packet_count):
+        """Test-and-set packet_count in the sequence window (O(1), fixed memory)
+
+        Each slot remembers the exact sequence number last seen there, so a
+        match is a true duplicate and packets a window apart never collide.
+        """
+        slot = packet_count & (self.seq_window - 1)
+        if self.seq_seen[slot] == packet_count:
+            return True
+        self.seq_seen[slot] = packet_count
+        return False
+
+    def reset_duplicates(self):
+        """Forget every remembered sequence number (the sender restarted its counter)"""
+        self.seq_seen = [-1] * self.seq_window
+        self._fec_seq = [-1] * self.fec_window
+        self._fec_ring_index = [-1] * self.fec_window
+
     def set_process_priority(self):
         """Set process to real-time priority for ultra-low latency"""
         try:
             if os.name == 'nt':  # Windows
-                import ctypes
                 # Set process to HIGH_PRIORITY_CLASS
                 ctypes.windll.kernel32.SetPriorityClass(-1, 0x00000080)
                 # Set thread to TIME_CRITICAL
@@ -625,145 +761,477 @@ class UDPReceiver:
         except Exception as e:
             print(f"⚠️ Could not optimize receiver priority: {e}")
     
+    def find_numa_local_cpus(self, interface=None):
+        """Allowed CPUs on the network card's NUMA node (all allowed CPUs if unknown)"""
+        allowed = os.sched_getaffinity(0)
+        net_dir = '/sys/class/net'
+        try:
+            interfaces = [interface] if interface else sorted(os.listdir(net_dir))
+        except OSError:
+            return sorted(allowed)
+
+        for iface in interfaces:
+            try:
+                with open(f'{net_dir}/{iface}/device/numa_node') as f:
+                    node = int(f.read())
+                if node < 0:
+                    continue  # Device not attached to a NUMA node
+                with open(f'/sys/devices/system/node/node{node}/cpulist') as f:
+                    local = sorted(parse_cpulist(f.read()) & allowed)
+            except (OSError, ValueError):
+                continue
+            if local:
+                return local
+        return sorted(allowed)
+
+    def thread_siblings(self, cpu):
+        """CPUs sharing a physical core with cpu, cpu included (sysfs SMT topology)"""
+        try:
+            with open(f'/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list') as f:
+                return parse_cpulist(f.read())
+        except (OSError, ValueError):
+            return {cpu}
+
+    def select_cores(self):
+        """Pick (receive core, audio core); overridable with threading.rx_core / audio_core
+
+        The receive core is NUMA-local to the network card and the audio
+        callback gets a different core. On Linux, where sysfs gives the SMT
+        topology, that is a different physical core, so the two never share an
+        SMT pair; elsewhere only the logical core is known to differ.
+        """
+        threading_config = self.config.get('threading', {})
+        if sys.platform.startswith('linux'):
+            allowed = sorted(os.sched_getaffinity(0))
+            local = self.find_numa_local_cpus(threading_config.get('interface'))
+            rx_core = threading_config.get('rx_core', local[-1])  # Stay off CPU 0 and its housekeeping IRQs
+            shared = self.thread_siblings(rx_core)
+        else:
+            allowed = list(range(os.cpu_count() or 1))
+            rx_core = threading_config.get('rx_core', allowed[-1])
+            shared = {rx_core}  # SMT siblings unknown: sibling numbering varies by CPU
+
+        others = [c for c in allowed if c not in shared] or [c for c in allowed if c != rx_core]
+        audio_core = threading_config.get('audio_core', others[-1] if others else None)
+        return rx_core, audio_core
+
+    def pin_receive_thread(self):
+        """Pin the calling thread to the receive core and raise its priority
+
+        SCHED_FIFO on Linux, THREAD_PRIORITY_TIME_CRITICAL on Windows.
+        """
+        if self._rx_core is None:
+            return
+
+        try:
+            if pin_current_thread(self._rx_core):
+                print(f"📌 Receive thread pinned to CPU {self._rx_core}")
+        except OSError as e:
+            print(f"⚠️ Could not pin receive thread: {e}")
+
+        if self.sock and sys.platform.startswith('linux'):
+            self.set_incoming_cpu(self._rx_core)  # Keep socket processing on the pinned core
+        priority = self.config.get('threading', {}).get('rx_priority', 50)
+        try:
+            policy = boost_current_thread(priority)
+            if policy:
+                print(f"✅ Receive thread priority set to {policy}")
+        except PermissionError:
+            print("⚠️ Could not set SCHED_FIFO (requires root or CAP_SYS_NICE)")
+        except OSError as e:
+            print(f"⚠️ Could not set receive thread priority: {e}")
+
+    def lock_memory(self):
+        """mlockall() the process so the ring buffer and code are never paged out (Linux/macOS)"""
+        if os.name == 'nt':
+            return
+        MCL_CURRENT, MCL_FUTURE = 1, 2  # Same values on Linux and macOS
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            if libc.mlockall(MCL_CURRENT | MCL_FUTURE) != 0:
+                err = ctypes.get_errno()
+                raise OSError(err, os.strerror(err))
+            print("🔒 Process memory locked (mlockall)")
+        except (OSError, AttributeError) as e:
+            print(f"⚠️ Could not lock memory (raise RLIMIT_MEMLOCK or run with CAP_IPC_LOCK): {e}")
+
+    def pin_audio_thread(self):
+        """Pin the audio callback thread to its core, once (called from the first callback)"""
+        self._audio_thread_pinned = True
+        if self._audio_core is None:
+            return
+        try:
+            if pin_current_thread(self._audio_core):
+                self.defer_print(f"📌 Audio callback thread pinned to CPU {self._audio_core}")
+        except OSError as e:
+            self.defer_print(f"⚠️ Could not pin audio callback thread: {e}")
+
+    def defer_print(self, message):
+        """Queue a message from the audio thread; the receive thread prints it (no console I/O on the callback)"""
+        self._message_queue.put_nowait(message)
+
+    def print_deferred(self):
+        """Print every message the audio thread has queued"""
+        while True:
+            try:
+                print(self._message_queue.get_nowait())
+            except queue.Empty:
+                return
+
     def adapt_jitter_buffer(self):
         """Dynamically adapt jitter buffer size based on network conditions"""
-        if len(self.packet_timestamps) < 10:
+        if self.packet_timestamp_count < 10:
             return
         
-        # Calculate network jitter
-        intervals = []
-        timestamps = list(self.packet_timestamps)
-        for i in range(1, len(timestamps)):
-            intervals.append(timestamps[i] - timestamps[i-1])
+        # Calculate network jitter over the arrival-time ring (compiled kernel)
+        jitter = interval_jitter(self.packet_timestamps, self.packet_timestamp_count)
         
-        if intervals:
-            avg_interval = sum(intervals) / len(intervals)
-            jitter = sum(abs(interval - avg_interval) for interval in intervals) / len(intervals)
-            
-            # Smooth jitter calculation
-            self.network_jitter = (1 - self.jitter_adaptation_rate) * self.network_jitter + \
-                                 self.jitter_adaptation_rate * jitter
-            
-            # Adapt buffer size
-            if self.network_jitter > 0.01:  # High jitter
-                self.adaptive_jitter_size = min(self.jitter_buffer_max, 
-                                              self.adaptive_jitter_size + 1)
-            elif self.network_jitter < 0.005:  # Low jitter
-                self.adaptive_jitter_size = max(self.jitter_buffer_min, 
-                                              self.adaptive_jitter_size - 1)
-    
-    def generate_concealment_audio(self):
-        """Generate concealment audio for lost packets"""
-        if self.last_audio_frame is None:
-            # Generate silence
-            return np.zeros((self.frame_samples, self.channels), dtype=np.float32)
-        
-        # Simple audio concealment - fade out last frame
-        concealment = self.last_audio_frame * 0.5
-        return concealment.astype(np.float32)
+        # Smooth jitter calculation
+        self.network_jitter = (1 - self.jitter_adaptation_rate) * self.network_jitter + \
+                             self.jitter_adaptation_rate * jitter
+        
+        # Adapt buffer size
+        if self.network_jitter > 0.01:  # High jitter
+            self.adaptive_jitter_size = min(self.jitter_buffer_max, 
+                                          self.adaptive_jitter_size + 1)
+        elif self.network_jitter < 0.005:  # Low jitter
+            self.adaptive_jitter_size = max(self.jitter_buffer_min, 
+                                          self.adaptive_jitter_size - 1)
     
     def track_audio_timing(self):
         """Precise audio timing for consistent playback"""
         current_time = time.perf_counter()
         
         # Calculate ideal timing
-        if hasattr(self, 'last_audio_time'):
+        if self.last_audio_time is not None:
             expected_time = self.last_audio_time + self.frame_interval
             timing_error = current_time - expected_time
             
             if abs(timing_error) > self.timing_precision:
                 self.timing_errors += 1
-                if self.config['logging']['verbose'] and self.timing_errors % 100 == 0:
-                    print(f"⚠️ Audio timing error: {timing_error*1000:.2f}ms")
+                if self._verbose and self.timing_errors % 100 == 0:
+                    self.defer_print(f"⚠️ Audio timing error: {timing_error*1000:.2f}ms")
         
         self.last_audio_time = current_time
         return current_time
     
     def enhanced_receive_packets(self):
         """Enhanced packet reception with ultra-low latency processing"""
+        self.pin_receive_thread()
         try:
             while self.receiving:
                 try:
-                    # Receive packet with minimal latency
                     if self.sock is None:
                         break
-                    data, addr = self.sock.recvfrom(4096)
-                    receive_time = time.perf_counter()
-                    
-                    self.packet_count += 1
-                    self.packets_received += 1
-                    
-                    # Process packet immediately for minimal latency
-                    self.process_packet(data, receive_time)
-                    
-                except socket.timeout:
-                    continue  # Normal timeout, keep receiving
+
+                    # Sleep until a datagram or the shutdown wakeup arrives, no timeout poll
+                    # (the io_uring backend waits on its completion queue instead)
+                    if not self.batch_receiver.waits:
+                        events = self._selector.select()
+                        if any(key.fileobj is self._wakeup_r for key, _ in events):
+                            break
+
+                    # Drain every queued datagram in one batch (recvmmsg/io_uring on Linux)
+                    packets = self.batch_receiver.recv()
+                    receive_ns = time.perf_counter_ns()  # Once per batch, integer ns throughout
+                    stamps = self.batch_receiver.timestamps if self._kernel_timestamps else None
+                    if stamps:
+                        # Kernel arrival stamps are wall-clock ns; shift them onto perf_counter_ns
+                        clock_offset_ns = receive_ns - time.time_ns()
+                    for i, data in enumerate(packets):
+                        arrival = stamps[i] if stamps else None
+                        # Process packet immediately for minimal latency (it counts itself)
+                        self.process_packet(data, receive_ns if arrival is None else arrival + clock_offset_ns)
+
+                    if not self._message_queue.empty():
+                        self.print_deferred()
+
                 except Exception as e:
-                    if self.receiving and self.config['logging']['verbose']:
+                    if self.receiving and self._verbose:
                         print(f"⚠️ Packet reception error: {e}")
                     continue
         except Exception as e:
             print(f"❌ Enhanced packet receiver error: {e}")
     
-    def process_packet(self, data, receive_time):
-        """Process received packet with ultra-low latency"""
+    def process_packet(self, data, arrival_ns):
+        """Process received packet with ultra-low latency (arrival_ns: perf_counter_ns clock)"""
         try:            # Parse UDP header for sequence and timing
-            if len(data) < 12:
+            if len(data) < _HDR.size:
+                return
+            
+            # packet_count(4) + timestamp(8) + opus_length(4) in one unpack, no slice copies
+            sequence_number, timestamp, opus_length = _HDR.unpack_from(data, 0)
+            if opus_length & FEC_FLAG:
+                self.process_fec_packet(data, sequence_number, opus_length)
                 return
             
-            # Basic UDP header parsing (packet_count + timestamp)
-            sequence_number = int.from_bytes(data[0:4], byteorder='big')
-            timestamp = int.from_bytes(data[4:12], byteorder='big')
+            # Parity packets are counted apart, so only audio packets reach the counters
+            self.packet_count += 1
+            self.packets_received += 1
+            # Jitter buffer adaptation every 50 packets, on the exact boundary
+            if self.packet_count % 50 == 0:
+                self.adapt_jitter_buffer()
             
-            # Update packet timing metrics
+            payload_end = _HDR.size + opus_length
+            if opus_length == 0 or len(data) < payload_end:
+                return
+            
+            # Update packet timing metrics (the interval ring holds float seconds)
+            receive_time = arrival_ns / 1e9
             self.last_packet_time = receive_time
-            self.packet_timestamps.append(receive_time)            # Extract and decode audio payload immediately
-            payload = data[12:]  # Skip UDP header
+            timestamps = self.packet_timestamps
+            timestamps[self.packet_timestamp_count % len(timestamps)] = receive_time
+            self.packet_timestamp_count += 1
+            # Zero-copy view of exactly opus_length bytes (trailing padding ignored)
+            payload = memoryview(data)[_HDR.size:payload_end]
+
+            # Sender capture clock vs arrival, integer ns (the clocks differ; only changes matter)
+            transit = arrival_ns - timestamp * 1000
+
+            # Behind in sequence is a late (reordered or re-delivered) packet, dropped below,
+            # unless it is more than half the sequence window back or the sender's capture
+            # clock went back with it: the sender restarted, so resync and forget old numbers
+            gap = 0 if self.expected_sequence is None else sequence_number - self.expected_sequence
+            if gap < 0 and (gap < -(self.seq_window >> 1)
+                            or transit - self._in_order_transit > RESTART_TRANSIT_JUMP_NS):
+                self.reset_duplicates()
+                self._prev_transit = None  # The old run's transit is no jitter baseline
+                self._in_order_transit = transit
+                gap = 0
+
+            if self.is_duplicate(sequence_number):
+                self.packets_duplicate += 1
+                return
+
+            # Sequence tracking: conceal gaps, drop frames whose slot was already concealed
+            if gap < 0:
+                self.packets_late += 1
+                return
+            # Only accepted packets feed the jitter estimate (duplicates and late ones would skew it)
+            self.calculate_jitter(timestamp, arrival_ns)
+            if gap > 0:
+                self.packets_lost += gap
+                first_concealed = self.audio_ring.write_index
+                self.conceal_lost_frames(gap)
+                if self.fec_enabled:
+                    self.remember_concealed(sequence_number, gap, first_concealed)
+            self.expected_sequence = sequence_number + 1
+            self._in_order_transit = transit
             
-            if len(payload) > 0:
-                # Decode Opus audio with minimal delay
-                pcm_data = self.opus_decoder.decode(payload, frame_size=self.frame_samples)
-                
-                # Convert to numpy array
-                audio_array = np.frombuffer(pcm_data, dtype=np.int16)
-                audio_float = audio_array.astype(np.float32) / 32767.0
-                  # Add to audio queue with enhanced overflow protection
-                with self.queue_lock:
-                    # Smart buffer management based on current state
-                    if self.buffer_state == "initializing" or self.buffer_state == "recovering":
-                        # During initialization/recovery, prioritize filling buffer
-                        if len(self.audio_queue) < self.max_queue_size:
-                            self.audio_queue.append(audio_float)
-                            
-                            # Check if we've reached pre-fill threshold
-                            if not self.buffer_prefill_complete and len(self.audio_queue) >= self.prefill_buffer_size:
-                                self.buffer_prefill_complete = True
-                                if self.config['logging']['verbose']:
-                                    print(f"✅ Ultra-fast buffer pre-fill complete: {len(self.audio_queue)} frames")
-                        else:
-                            # Buffer full during init - cycle oldest
-                            self.audio_queue.popleft()
-                            self.audio_queue.append(audio_float)
-                    else:
-                        # Normal playback - low-latency management
-                        if len(self.audio_queue) < self.max_queue_size:
-                            self.audio_queue.append(audio_float)
-                        else:
-                            # Drop oldest frame for ultra-low latency
-                            self.audio_queue.popleft()
-                            self.audio_queue.append(audio_float)
-                            self.buffer_overruns += 1
-                        
+            # Decode Opus audio straight into the ring with minimal delay
+            self.decode_into_ring(payload)
+            if self.fec_enabled:
+                self.remember_payload(sequence_number, payload)
+
+            if self.packet_count % self._stats_interval == 0:
+                self.report_stats()
+
         except Exception as e:
-            if self.config['logging']['verbose']:
+            if self._verbose:
                 print(f"⚠️ Ultra-low latency packet processing error: {e}")
-    
+
+    def remember_payload(self, sequence_number, payload):
+        """Keep a copy of a received payload for parity recovery (the receive buffer is reused)"""
+        slot = sequence_number & (self.fec_window - 1)
+        length = len(payload)
+        self._fec_store[slot, :length] = np.frombuffer(payload, dtype=np.uint8)
+        self._fec_seq[slot] = sequence_number
+        self._fec_len[slot] = length
+        self._fec_ring_index[slot] = -1
+
+    def remember_concealed(self, next_sequence, lost, first_ring_index):
+        """Record which ring frame each just-concealed sequence number was written to
+
+        conceal_lost_frames fills at most max_sequence_gap frames, for the
+        newest lost sequence numbers; older ones get no ring frame.
+        """
+        concealed = self.audio_ring.write_index - first_ring_index
+        mask = self.fec_window - 1
+        for i in range(min(lost, self.fec_window)):
+            sequence = next_sequence - 1 - i
+            self._fec_seq[sequence & mask] = -1
+            self._fec_ring_index[sequence & mask] = first_ring_index + concealed - 1 - i if i < concealed else -1
+
+    def process_fec_packet(self, data, first_sequence, field):
+        """Rebuild the one missing frame of a parity group, if exactly one is missing
+
+        A frame still ahead of expected_sequence is decoded in order as if it
+        had arrived. One already concealed is decoded by the separate recovery
+        decoder straight over its concealed ring frame, provided the audio
+        callback has not reached that frame yet.
+        """
+        self.fec_packets_received += 1
+        if not self.fec_enabled:
+            return
+        group = (field >> 16) & 0x7FFF
+        size = field & 0xFFFF
+        if not 0 < group <= self.fec_window // 2 or size <= _FEC_LEN.size or len(data) < _HDR.size + size:
+            return
+        
+        mask = self.fec_window - 1
+        missing = None
+        for sequence in range(first_sequence, first_sequence + group):
+            if self._fec_seq[sequence & mask] != sequence:
+                if missing is not None:
+                    return  # Two or more lost: one parity cannot rebuild them
+                missing = sequence
+        if missing is None:
+            return
+        
+        # XOR the parity with every frame that did arrive
+        parity_size = size - _FEC_LEN.size
+        out = self._fec_out
+        out[:parity_size] = np.frombuffer(data, dtype=np.uint8, count=parity_size, offset=_HDR.size + _FEC_LEN.size)
+        length = _FEC_LEN.unpack_from(data, _HDR.size)[0]
+        for sequence in range(first_sequence, first_sequence + group):
+            if sequence != missing:
+                slot = sequence & mask
+                n = self._fec_len[slot]
+                length ^= n
+                np.bitwise_xor(out[:n], self._fec_store[slot, :n], out=out[:n])
+        if not 0 < length <= parity_size:
+            return
+        payload = memoryview(out)[:length]
+        
+        if missing == self.expected_sequence:
+            # Not concealed yet: play it in order, exactly as if it had arrived
+            self.is_duplicate(missing)
+            self.expected_sequence = missing + 1
+            self.decode_into_ring(payload)
+            self.remember_payload(missing, payload)
+            self.packets_recovered += 1
+            return
+        
+        # Already concealed: overwrite the concealed frame if playback has not reached it
+        index = self._fec_ring_index[missing & mask]
+        ring = self.audio_ring
+        if index < 0 or index <= ring.read_index + 1 or index <= ring.write_index - ring.capacity:
+            return
+        self.decode_recovered(missing, payload, ring.buffer[index % ring.slots])
+        self.packets_recovered += 1
+
+    def decode_recovered(self, sequence_number, payload, slot):
+        """Decode a recovered payload into slot with the recovery decoder, primed with the previous frame"""
+        decoder = self._fec_decoder
+        previous = (sequence_number - 1) & (self.fec_window - 1)
+        frames = []
+        if self._fec_seq[previous] == sequence_number - 1:
+            frames.append((memoryview(self._fec_store[previous, :self._fec_len[previous]]), self._fec_prime))
+        frames.append((payload, slot))
+        for data, out in frames:
+            if self._opus_decode_float is None:
+                pcm = np.frombuffer(decoder.decode(bytes(data), frame_size=self.frame_samples), dtype=np.int16)
+                flat = out.reshape(-1)
+                samples = min(len(pcm), len(flat))
+                s16_to_f32(pcm[:samples], flat[:samples])
+                flat[samples:] = 0.0
+                continue
+            size = len(data)
+            decoded = self._opus_decode_float(decoder.decoder_state, (ctypes.c_ubyte * size).from_buffer(data), size,
+                                              out.ctypes.data_as(ctypes.POINTER(ctypes.c_float)),
+                                              self.frame_samples, 0)
+            if decoded < 0:
+                raise opuslib.OpusError(decoded)
+            if decoded < self.frame_samples:
+                out[decoded:] = 0.0
+
+    def report_stats(self):
+        """Every stats_interval packets: print a summary (verbose) and queue a CSV row"""
+        elapsed = time.perf_counter() - (self.start_time or time.perf_counter())
+        rate = self.packet_count / elapsed if elapsed > 0 else 0
+        total_packets = self.packets_received + self.packets_lost
+        loss_rate = (self.packets_lost / total_packets) * 100 if total_packets > 0 else 0
+        queue_size = len(self.audio_ring)
+
+        if self._verbose:
+            print(f"UDP: {self.packet_count} pkts, {rate:.1f} pkt/s, "
+                  f"loss: {loss_rate:.2f}%, jitter: {self.jitter*1000:.1f}ms, "
+                  f"queue: {queue_size}")
+
+        self.log_metrics_to_csv(elapsed, rate, loss_rate, queue_size)
+
+    def conceal_lost_frames(self, lost):
+        """Fill missing frames with the decoder's packet loss concealment (PLC only)
+
+        The sender's RESTRICTED_LOWDELAY encoder is CELT-only, so its packets
+        carry no LBRR (in-band FEC) data to recover a lost frame from; lost
+        frames come back only through the XOR parity path (process_fec_packet).
+        """
+        concealed = min(lost, self.max_sequence_gap)
+        for _ in range(concealed):
+            self.decode_into_ring(None)
+
+        if self._verbose and self.packets_lost % 50 < lost:
+            print(f"📉 Concealed {concealed}/{lost} lost frames (total lost: {self.packets_lost})")
+
+    def decode_into_ring(self, payload):
+        """Decode an Opus payload as float32 directly into the next ring slot
+
+        payload None runs packet loss concealment.
+        """
+        decode_float = self._opus_decode_float
+        if decode_float is None:
+            # opuslib's decode() needs bytes (empty = PLC) and returns int16 PCM
+            pcm_data = self.opus_decoder.decode(bytes(payload) if payload is not None else b'',
+                                                frame_size=self.frame_samples,
+                                                decode_fec=False)
+            self.enqueue_pcm(pcm_data)
+            return
+
+        # Writable receive buffers are passed zero-copy; read-only payloads are copied once
+        if payload is None:
+            data, size = None, 0
+        elif isinstance(payload, memoryview) and not payload.readonly:
+            size = len(payload)
+            data = (ctypes.c_ubyte * size).from_buffer(payload)
+        else:
+            size = len(payload)
+            data = (ctypes.c_ubyte * size).from_buffer_copy(payload)
+
+        slot = self.audio_ring.write_slot()
+        decoded = decode_float(self.opus_decoder.decoder_state, data, size,
+                               slot.ctypes.data_as(ctypes.POINTER(ctypes.c_float)),
+                               self.frame_samples, 0)
+        if decoded < 0:
+            raise opuslib.OpusError(decoded)
+        if decoded < self.frame_samples:
+            slot[decoded:] = 0.0
+        self.publish_ring_slot()
+
+    def enqueue_pcm(self, pcm_data):
+        """Convert decoded int16 PCM straight into the next ring slot and publish it"""
+        slot = self.audio_ring.write_slot().reshape(-1)
+        audio_array = np.frombuffer(pcm_data, dtype=np.int16)
+        samples = min(len(audio_array), len(slot))
+        # Single fused cast+scale pass written straight into the slot (no temporaries)
+        s16_to_f32(audio_array[:samples], slot[:samples])
+        if samples < len(slot):
+            slot[samples:] = 0.0
+        self.publish_ring_slot()
+
+    def publish_ring_slot(self):
+        """Commit the slot just written and track overrun/pre-fill state"""
+        ring = self.audio_ring
+        filling = self.buffer_state == "initializing" or self.buffer_state == "recovering"
+
+        # A full ring drops its oldest frame; only count it once playback is running
+        if ring.is_full() and not filling:
+            self.buffer_overruns += 1
+        ring.commit()
+
+        # Check if we've reached pre-fill threshold during initialization/recovery
+        if filling and not self.buffer_prefill_complete and len(ring) >= self.prefill_buffer_size:
+            self.buffer_prefill_complete = True
+            if self._verbose:
+                print(f"✅ Buffer pre-fill complete: {len(ring)} frames")
+
     def cleanup_enhanced(self):
         """Enhanced cleanup with performance metrics"""
         print("\n🧹 Enhanced cleanup starting...")
         
         # Stop receiving
         self.receiving = False
+        self.wake_receive_thread()
         
         # Display final performance metrics
         if self.start_time:
@@ -772,6 +1240,8 @@ class UDPReceiver:
             print(f"⏱️ Runtime: {runtime:.2f}s")
             print(f"📦 Packets received: {self.packets_received}")
             print(f"❌ Packets lost: {self.packets_lost}")
+            if self.fec_enabled:
+                print(f"🛟 Recovered from parity: {self.packets_recovered} ({self.fec_packets_received} parity packets)")
             print(f"🔄 Buffer underruns: {self.buffer_underruns}")
             print(f"🔄 Buffer overruns: {self.buffer_overruns}")
             print(f"🎵 Audio glitches: {self.audio_glitches}")
@@ -783,7 +1253,7 @@ class UDPReceiver:
         
         # Clean up resources
         try:
-            if hasattr(self, 'receive_thread') and self.receive_thread and self.receive_thread.is_alive():
+            if self.receive_thread is not None and self.receive_thread.is_alive():
                 self.receive_thread.join(timeout=1.0)
         except Exception as e:
             print(f"⚠️ Thread cleanup warning: {e}")
@@ -806,6 +1276,12 @@ class UDPReceiver:
         # Set process priority for real-time performance
         if self.realtime_priority:
             self.set_process_priority()
+
+        # Separate physical cores for the receive thread and the audio callback
+        if self.config.get('threading', {}).get('pin_cores', False):
+            self._rx_core, self._audio_core = self.select_cores()
+        if self.config.get('threading', {}).get('lock_memory', False):
+            self.lock_memory()
         
         if self.output_device is None:
             print("❌ Cannot start without valid audio output device")
@@ -815,34 +1291,59 @@ class UDPReceiver:
             print("❌ Cannot start without valid socket")
             return False
         
+        previous_sigint = None
         try:
             self.receiving = True
             self.packet_count = 0
             self.packets_received = 0
             self.packets_lost = 0
             self.packets_late = 0
+            self.packets_duplicate = 0
+            self.fec_packets_received = 0
+            self.packets_recovered = 0
             self.buffer_underruns = 0
             self.audio_glitches = 0
             self.timing_errors = 0
             self.consecutive_underruns = 0
             self.buffer_health_score = 100
-            self.expected_sequence = 1
-            self.sequence_buffer.clear()
+            self.expected_sequence = None
+            self.reset_duplicates()
+            self._stop_event.clear()
             self.start_time = time.perf_counter()
             self.last_audio_time = self.start_time
+            self._session_start_iso = datetime.now().isoformat()  # Wall-clock session_start CSV column
             
             # Initialize buffer state
             self.buffer_state = "initializing"
             self.playback_started = False
             self.buffer_prefill_complete = False
             
-            # Set socket timeout for responsive shutdown
-            self.sock.settimeout(0.1)
+            # Batched receive backend: io_uring (opt-in), recvmmsg, or plain recv
+            use_io_uring = self.config['network'].get('use_io_uring', False)
+            self._kernel_timestamps = self.config['network'].get('kernel_timestamps', False)
+            batch_size = self.config['network'].get('recv_batch_size', 32)
+            self.batch_receiver = create_receiver(self.sock, use_io_uring, self._kernel_timestamps, batch_size)
+            if self.batch_receiver.waits:
+                print("📦 Batched receive enabled (io_uring)")
+            elif self.batch_receiver.batched:
+                print(f"📦 Batched receive enabled (recvmmsg, up to {batch_size} datagrams per call)")
+
+            # One selector for data and shutdown; a socketpair (unlike os.pipe) is selectable on Windows
+            self._wakeup_r, self._wakeup_w = socket.socketpair()
+            self._selector = selectors.DefaultSelector()
+            self._selector.register(self.sock, selectors.EVENT_READ)
+            self._selector.register(self._wakeup_r, selectors.EVENT_READ)
             
             print("✅ Ultra-low latency reception started")
             print("📊 Enhanced metrics enabled")
             print("Press Ctrl+C to stop...")
             
+            # Ctrl+C sets the stop event instead of raising into the stream context
+            try:
+                previous_sigint = signal.signal(signal.SIGINT, self.handle_sigint)
+            except ValueError:
+                pass  # Not the main thread, keep the default handler
+            
             # Start packet reception thread
             self.receive_thread = threading.Thread(target=self.enhanced_receive_packets, daemon=True)
             self.receive_thread.start()
@@ -854,16 +1355,18 @@ class UDPReceiver:
                 samplerate=self.sample_rate,
                 blocksize=self.frame_samples,  # Match frame size
                 dtype=np.float32,
-                callback=self.audio_callback,
+                callback=self.make_audio_callback(),
+                finished_callback=self._stop_event.set,  # Device lost or stream aborted
                 latency='low'  # Request lowest possible latency
             ):
-                # Keep alive with minimal CPU usage and adaptive jitter monitoring
-                while self.receiving:
-                    time.sleep(0.01)  # 10ms for responsiveness
-                    
-                    # Periodic jitter buffer adaptation
-                    if self.packet_count % 50 == 0:  # Every 50 packets
-                        self.adapt_jitter_buffer()
+                # Park until stop_receiving(), Ctrl+C or the stream ending; the receive
+                # thread drives adaptation. Windows needs the timeout: an untimed
+                # Event.wait there blocks the SIGINT handler until it returns
+                if sys.platform == 'win32':
+                    while not self._stop_event.wait(timeout=0.5):
+                        pass
+                else:
+                    self._stop_event.wait()
             
             return True
             
@@ -873,11 +1376,31 @@ class UDPReceiver:
             traceback.print_exc()
             return False
         finally:
+            if previous_sigint is not None:
+                signal.signal(signal.SIGINT, previous_sigint)
+            self.print_deferred()
             self.cleanup_enhanced()
     
+    def handle_sigint(self, signum, frame):
+        """SIGINT handler: stop reception and release the main thread's wait"""
+        print("\n🛑 Interrupted by user")
+        self.receiving = False
+        self.wake_receive_thread()
+        self._stop_event.set()
+
+    def wake_receive_thread(self):
+        """Interrupt the receive thread's selector wait so it exits immediately"""
+        if self._wakeup_w is not None:
+            try:
+                self._wakeup_w.send(b'\0')
+            except OSError:
+                pass
+
     def stop_receiving(self):
         """Stop reception"""
         self.receiving = False
+        self.wake_receive_thread()
+        self._stop_event.set()  # Wake the main loop so it notices immediately
         
         if self.receive_thread and self.receive_thread.is_alive():
             self.receive_thread.join(timeout=2.0)
@@ -885,20 +1408,42 @@ class UDPReceiver:
     def cleanup(self):
         """Clean up resources"""
         self.receiving = False
+        self.wake_receive_thread()
         
+        if self._selector:
+            self._selector.close()
+            self._selector = None
+        for wakeup_sock in (self._wakeup_r, self._wakeup_w):
+            if wakeup_sock:
+                wakeup_sock.close()
+        self._wakeup_r = self._wakeup_w = None
+
+        if self.batch_receiver:
+            try:
+                self.batch_receiver.close()
+            except Exception:
+                pass
+            self.batch_receiver = None
+
         if self.sock:
             try:
                 self.sock.close()
-            except:
-                pass
+            except OSError as e:
+                print(f"⚠️ Socket close failed: {e}")
             self.sock = None
         
+        if self.log_thread:
+            self._log_queue.put(None)  # Let the logger drain queued rows, then exit
+            self.log_thread.join(timeout=2.0)
+            self.log_thread = None
+
         if self.csv_file_handle:
             try:
+                self.csv_file_handle.flush()  # Only flush point for buffered rows
                 self.csv_file_handle.close()
                 print(f"Metrics saved to: {self.csv_file}")
-            except:
-                pass
+            except OSError as e:
+                print(f"⚠️ Could not close metrics file: {e}")
             self.csv_file_handle = None
             self.csv_writer = None
             
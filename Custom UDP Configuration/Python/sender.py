@@ -16,10 +16,17 @@ Packet Format:
     opus_data: variable length (compressed audio)
 
 Total header size: 16 bytes + opus_data
+
+With network.fec_group = K, every K data packets are followed by one XOR
+parity packet: packet_count is the group's first sequence number,
+opus_length is FEC_FLAG | K << 16 | parity length, and the parity payload
+is the XOR of the group's payload lengths (2 bytes) and payloads (zero
+padded to the longest).
 Compatible with UDPAudioReceiver and optimized for real-time streaming
 """
 
 import socket
+import ctypes
 import sounddevice as sd
 import threading
 import time
@@ -29,10 +36,12 @@ import sys
 import opuslib
 import json
 import os
+import errno
 import csv
 from datetime import datetime
 import queue
-from collections import deque
+from metrics_log import BinaryMetricsWriter, CSV_HEADERS, format_timestamp_ms, logger_loop
+from realtime import boost_current_thread, pin_current_thread
 
 # Optional process optimization
 try:
@@ -42,11 +51,62 @@ except ImportError:
     psutil = None
     PSUTIL_AVAILABLE = False
 
+# Optional fast JSON parsing for the config file
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+# Packet header: packet_count(4) + timestamp(8) + opus_length(4), network byte order
+_HDR = struct.Struct('!LQL')
+MAX_OPUS_PACKET = 1275  # Largest single-frame Opus packet (RFC 6716)
+PCM_POINTER = ctypes.POINTER(ctypes.c_int16)
+UDP_SEGMENT = getattr(socket, 'UDP_SEGMENT', 103)  # Linux UDP GSO cmsg type (SOL_UDP)
+FEC_FLAG = 0x80000000  # opus_length high bit: XOR parity packet (opus_length never exceeds 1275)
+_FEC_LEN = struct.Struct('!H')  # XOR of the group's payload lengths, first in the parity payload
+MAX_ADAPTIVE_SPIN_NS = 500_000  # Longest adaptive congestion delay spun out per frame
+# Tail of each pacing wait that is spun rather than slept. time.sleep is a high-resolution
+# timer wait on Linux/macOS and, from Python 3.11, on Windows (high-resolution waitable
+# timer); older Windows Pythons only get the ~1ms timer set by timeBeginPeriod(1)
+SLEEP_SPIN_NS = 100_000 if (os.name != 'nt' or sys.version_info >= (3, 11)) else 2_000_000
+
+def bind_opus_encode():
+    """Bind libopus opus_encode with pointer arguments, or None if unavailable
+
+    Takes a fresh function pointer from opuslib's CDLL so opuslib's own
+    bindings keep their argtypes. Encoding reads int16 PCM straight from a
+    numpy view and writes the packet into a caller-owned buffer instead of
+    returning a new bytes object.
+    """
+    try:
+        encode = opuslib.api.libopus['opus_encode']
+        encode.argtypes = (
+            opuslib.api.encoder.EncoderPointer,
+            PCM_POINTER,                     # pcm in, interleaved
+            ctypes.c_int,                    # frame_size (samples per channel)
+            ctypes.POINTER(ctypes.c_ubyte),  # data out
+            ctypes.c_int32                   # max_data_bytes
+        )
+        encode.restype = ctypes.c_int32
+        return encode
+    except (AttributeError, OSError):
+        return None
+
+def is_send_buffer_full(error):
+    """True for the errors a non-blocking UDP send raises when the kernel queue is full"""
+    return isinstance(error, BlockingIOError) or error.errno == errno.ENOBUFS
+
 class UltraLowLatencyUDPSender:
     def __init__(self, config_file="config.json"):
         # Load configuration from JSON file with defaults
         self.config = self.load_config(config_file)
         
+        # Logging switches read on every callback, resolved once
+        self._verbose = bool(self.config['logging'].get('verbose', False))
+        self._stats_interval = int(self.config['logging'].get('stats_interval', 100))
+        
         # Network configuration
         self.target_ip = self.config['network']['ip']
         self.target_port = self.config['network']['port']
@@ -68,6 +128,19 @@ class UltraLowLatencyUDPSender:
         )
         self.opus_encoder.bitrate = self.opus_bitrate
         
+        # Pinned encoder settings: complexity 5 is about half the CPU of the default 10 with
+        # no audible loss at this bitrate; CBR gives constant-size packets; DTX shrinks
+        # silent frames to a byte or two (still sent, so the receiver sees no gap);
+        # packet_loss_perc makes CELT lean less on inter-frame prediction
+        opus_config = self.config['opus']
+        self.opus_encoder.complexity = int(opus_config.get('complexity', 5))
+        self.opus_encoder.vbr = int(bool(opus_config.get('vbr', False)))
+        # DTX goes through the CTL directly: opuslib's Encoder.dtx setter (3.0.1) passes
+        # its value to ctl.get_dtx instead of set_dtx and raises TypeError
+        opuslib.api.encoder.encoder_ctl(self.opus_encoder.encoder_state, opuslib.api.ctl.set_dtx,
+                                        int(bool(opus_config.get('dtx', True))))
+        self.opus_encoder.packet_loss_perc = int(opus_config.get('packet_loss_perc', 5))
+        
         # Calculate samples per Opus frame
         self.opus_frame_samples = int(self.sample_rate * self.opus_frame_duration / 1000)
 
@@ -83,51 +156,122 @@ class UltraLowLatencyUDPSender:
         
         # UDP socket
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        # Minimize socket buffer for low latency
-        buffer_size = self.config['network']['socket_buffer_size']
-        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, buffer_size)
+        self.set_send_buffer()
+        self.set_socket_priority()
+        self.sock.setblocking(False)  # A full send buffer drops the frame instead of stalling the tx thread
           # Advanced performance tracking
         self.packets_sent = 0
         self.send_errors = 0
+        self.send_drops = 0
+        self.icmp_errors = 0  # Stale ICMP unreachables cleared by a retry (not send failures)
         self.timing_errors = 0
         self.buffer_underruns = 0
         self.network_congestion_events = 0
         
         # Ultra-precise timing control
         self.frame_interval = self.opus_frame_duration / 1000.0  # Convert to seconds
-        self.next_send_time = 0.0
-        self.timing_precision = 0.001  # 1ms precision target
+        # Send schedule in integer perf_counter_ns: no float drift, no wall-clock jumps
+        self.frame_interval_ns = int(self.opus_frame_duration * 1_000_000)
+        self.next_send_ns = 0
+        self.timing_precision_ns = 1_000_000  # 1ms precision target
         
         # Adaptive sending parameters
-        self.adaptive_delay = 0.0
+        self.adaptive_delay_ns = 0  # Congestion delay, scaled into MAX_ADAPTIVE_SPIN_NS
+        self.applied_delay_ns = 0  # Delay actually spun out before the latest send
         self.congestion_detected = False
         self.last_congestion_time = 0.0
-        self.send_timestamps = deque(maxlen=100)  # Track recent send times
+        self._last_send_ns = 0  # perf_counter_ns of the latest send
+        self._send_count = 0
+        self._send_interval_ewma = 0.0  # Smoothed send interval T_a (seconds)
+        self.congestion_degree = 0.0  # C_d = T_a / expected send interval
           # Real-time priority settings
         self.realtime_priority = True
+        self._message_queue = queue.SimpleQueue()  # Callback-side messages, printed by the main thread
         
         # Control flags
         self.streaming = False
         self.packet_count = 0
         self.start_time = None
+        self._session_start_iso = None  # Wall-clock session_start CSV column, set once per stream
+        self._t0_ns = 0
+        self._timer_period_set = False  # Windows 1ms timer resolution requested
+        
+        # Preallocated capture ring for Opus frame accumulation. Its size is a whole
+        # number of frames and reads advance frame by frame, so a frame never wraps
+        self.ring_frames = 10
+        self._ring = np.zeros((self.opus_frame_samples * self.ring_frames, self.channels), dtype=np.int16)
+        self._rows_written = 0  # Callback-owned, monotonic: rows captured so far
+        self._frames_published = 0  # Callback-owned: frames handed to the encode thread
+        self._frame_queue = queue.SimpleQueue()  # (frame number, capture ns) per complete frame
+        self.encode_thread = None
+        # One prebuilt PCM pointer per ring frame for the direct opus_encode call
+        self._frame_ptrs = [self._ring[i * self.opus_frame_samples:(i + 1) * self.opus_frame_samples].ctypes.data_as(PCM_POINTER)
+                            for i in range(self.ring_frames)]
+        # Preallocated silent frame, sent in place of audio when capture stalls. It is
+        # encoded once here and the packet reused for every silent frame, which the
+        # receiver plays as plain silence (an encoder-state mismatch is inaudible)
+        self._silence = np.zeros((self.opus_frame_samples, self.channels), dtype=np.int16)
+        self._silence_opus = self.opus_encoder.encode(self._silence.tobytes(), self.opus_frame_samples)
+        self.silence_frames = 0
+        
+        # Reused packet buffer: header packed in place. sendmsg() gathers header and
+        # payload in one syscall; without it (Windows) the payload is copied in behind
+        self._pkt_buf = bytearray(_HDR.size + MAX_OPUS_PACKET)
+        self._pkt_view = memoryview(self._pkt_buf)
+        self._hdr_view = self._pkt_view[:_HDR.size]
+        self._use_sendmsg = hasattr(self.sock, 'sendmsg')
+        self._addr = (self.target_ip, self.target_port)
+        self.connect_socket()
+        
+        # Optional XOR parity: one extra packet per fec_group frames lets the receiver
+        # rebuild any single lost frame of the group (retransmits would arrive too late)
+        self.fec_group = max(0, min(int(self.config['network'].get('fec_group', 0)), 32))
+        self._fec_buf = bytearray(_HDR.size + _FEC_LEN.size + MAX_OPUS_PACKET)
+        self._fec_view = memoryview(self._fec_buf)
+        self._fec_parity = np.frombuffer(self._fec_buf, dtype=np.uint8, offset=_HDR.size + _FEC_LEN.size)
+        self._fec_len_xor = 0
+        self._fec_max_len = 0
+        self.fec_packets_sent = 0
+        
+        # Optional Linux UDP GSO: gso_frames packets leave in one sendmsg and the
+        # kernel/NIC splits them, at the cost of gso_frames - 1 frames of added latency
+        self.gso_frames = max(1, int(self.config['network'].get('gso_frames', 1)))
+        if self.gso_frames > 1 and not (sys.platform.startswith('linux') and self._use_sendmsg):
+            print("⚠️ gso_frames needs Linux UDP GSO, sending one packet per frame")
+            self.gso_frames = 1
+        # Preallocated batch: each packet is packed into its own slot (large enough for
+        # a parity packet), then the slots are closed up to the segment size on flush
+        self._gso_stride = len(self._fec_buf)
+        self._gso_buf = bytearray(self.gso_frames * self._gso_stride)
+        self._gso_view = memoryview(self._gso_buf)
+        self._gso_bytes = np.frombuffer(self._gso_buf, dtype=np.uint8)
+        self._gso_lens = [0] * self.gso_frames
+        self._gso_count = 0  # Packets waiting in the batch
         
-        # Audio buffer for Opus frame accumulation
-        self.audio_buffer = np.array([], dtype=np.int16).reshape(0, self.channels)
+        # Direct opus_encode writes each packet's payload in behind the header
+        self._opus_encode = bind_opus_encode()
+        self._opus_out = (ctypes.c_ubyte * MAX_OPUS_PACKET).from_buffer(self._pkt_buf, _HDR.size)
         
-        # CSV logging setup
-        self.csv_file = self.config['logging'].get('sender_csv_file', 'sender_metrics.csv')
+        # CSV logging setup ("binary": fixed-size records, exported with metrics_log.py)
+        self._binary_log = self.config['logging'].get('sender_log_format', 'csv') == 'binary'
+        if self._binary_log:
+            self.csv_file = self.config['logging'].get('sender_binary_log', 'sender_metrics.bin')
+        else:
+            self.csv_file = self.config['logging'].get('sender_csv_file', 'sender_metrics.csv')
         self.csv_writer = None
         self.csv_file_handle = None
+        self._log_queue = queue.SimpleQueue()  # (time_ns, row) items for the logger thread
+        self.log_thread = None
         self.init_csv_logging()
         
     def load_config(self, config_file):
         """Load configuration directly from JSON file"""
-        if not os.path.exists(config_file):
+        try:
+            with open(config_file, 'rb') as f:
+                config = orjson.loads(f.read()) if ORJSON_AVAILABLE else json.load(f)
+        except FileNotFoundError:
             print(f"Error: config file '{config_file}' not found.")
             sys.exit(1)
-        try:
-            with open(config_file, 'r') as f:
-                config = json.load(f)
         except Exception as e:
             print(f"Error reading config file: {e}")
             sys.exit(1)
@@ -142,6 +286,61 @@ class UltraLowLatencyUDPSender:
         except Exception as e:
             print(f"Error saving config file: {e}")
     
+    def set_send_buffer(self):
+        """Request a roomy kernel send buffer and report what was granted
+
+        UDP latency does not grow with SO_SNDBUF; an undersized one makes bursts
+        (catch-up after a scheduling stall) fail with send errors instead.
+        Linux caps the request at net.core.wmem_max (see BUFFER_OPTIMIZATIONS.md).
+        """
+        requested = self.config['network'].get('socket_buffer_size', 1024 * 1024)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, requested)
+
+        actual = self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF)
+        # Linux reports double the requested size to account for bookkeeping overhead
+        expected = requested * 2 if sys.platform.startswith('linux') else requested
+        if actual < expected:
+            print(f"⚠️ Send buffer limited to {actual} bytes (requested {requested}); "
+                  f"raise net.core.wmem_max to avoid send errors")
+        else:
+            print(f"Send buffer: {actual} bytes")
+
+    def connect_socket(self):
+        """Fix the peer with connect() so each send skips address checks and the route lookup
+
+        Falls back to per-call sendto() addressing when connect() fails.
+        """
+        try:
+            self.sock.connect(self._addr)
+            self._connected = True
+        except OSError as e:
+            print(f"⚠️ Could not connect UDP socket to {self.target_ip}:{self.target_port}: {e}")
+            self._connected = False
+        # sendmsg() address argument: none on a connected socket
+        self._dest = () if self._connected else (self._addr,)
+
+    def set_socket_priority(self):
+        """Mark packets DSCP EF for routers/NIC queues and, on Linux, queue them ahead locally
+
+        ip_tos defaults to 0xB8 (EF, expedited forwarding). Windows only honours
+        it under a QoS policy. SO_PRIORITY 0-6 needs no privileges; 7 requires CAP_NET_ADMIN.
+        """
+        tos = self.config['network'].get('ip_tos', 0xB8)
+        try:
+            self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_TOS, tos)
+            print(f"✅ IP TOS 0x{tos:02X}")
+        except (AttributeError, OSError) as e:
+            print(f"⚠️ Could not set IP TOS 0x{tos:02X}: {e}")
+
+        if not sys.platform.startswith('linux'):
+            return
+        priority = self.config['network'].get('socket_priority', 6)
+        try:
+            self.sock.setsockopt(socket.SOL_SOCKET, getattr(socket, 'SO_PRIORITY', 12), priority)
+            print(f"✅ Socket priority {priority}")
+        except OSError as e:
+            print(f"⚠️ Could not set socket priority {priority}: {e}")
+
     def init_csv_logging(self):
         """Initialize CSV logging"""
         if not self.config['logging']['enable_csv']:
@@ -151,31 +350,25 @@ class UltraLowLatencyUDPSender:
             # Check if file exists to determine if we need to write headers
             file_exists = os.path.exists(self.csv_file)
             
-            self.csv_file_handle = open(self.csv_file, 'a', newline='')
-            self.csv_writer = csv.writer(self.csv_file_handle)
+            if self._binary_log:
+                self.csv_file_handle = open(self.csv_file, 'ab', buffering=1 << 16)
+                self.csv_writer = BinaryMetricsWriter(self.csv_file_handle)
+            else:
+                self.csv_file_handle = open(self.csv_file, 'a', newline='', buffering=1 << 16)
+                self.csv_writer = csv.writer(self.csv_file_handle)
             
             # Write headers if file is new
-            if not file_exists:
-                headers = [
-                    'timestamp',
-                    'session_start', 
-                    'packet_count',
-                    'elapsed_time',
-                    'packet_rate',
-                    'compression_ratio',
-                    'raw_bytes',
-                    'compressed_bytes',
-                    'target_ip',
-                    'target_port',
-                    'sample_rate',
-                    'channels',
-                    'opus_bitrate',
-                    'frame_duration'
-                ]
-                self.csv_writer.writerow(headers)
-                self.csv_file_handle.flush()
+            if not file_exists and not self._binary_log:
+                self.csv_writer.writerow(CSV_HEADERS)
+            
+            # File I/O happens on its own thread, never in the audio callback
+            self.log_thread = threading.Thread(
+                target=logger_loop, daemon=True,
+                args=(self._log_queue, self.csv_writer, self.csv_file_handle,
+                      None if self._binary_log else self.format_csv_row))
+            self.log_thread.start()
                 
-            print(f"CSV logging enabled: {self.csv_file}")
+            print(f"{'Binary' if self._binary_log else 'CSV'} logging enabled: {self.csv_file}")
             
         except Exception as e:
             print(f"Error initializing CSV logging: {e}")
@@ -186,14 +379,13 @@ class UltraLowLatencyUDPSender:
             self.csv_file_handle = None
 
     def log_metrics_to_csv(self, elapsed, rate, compression_ratio, raw_bytes, compressed_bytes):
-        """Log metrics to CSV file"""
+        """Queue a metrics row for the logger thread"""
         if not self.csv_writer:
             return
             
         try:
             row = [
-                datetime.now().isoformat(),
-                datetime.fromtimestamp(self.start_time).isoformat() if self.start_time else "Unknown",
+                self._session_start_iso or "Unknown",
                 self.packet_count,
                 elapsed,
                 rate,
@@ -203,15 +395,38 @@ class UltraLowLatencyUDPSender:
                 self.target_ip,
                 self.target_port,
                 self.sample_rate,
-                self.channels,                self.opus_bitrate,
+                self.channels,
+                self.opus_bitrate,
                 self.opus_frame_duration
             ]
-            self.csv_writer.writerow(row)
-            if self.csv_file_handle:
-                self.csv_file_handle.flush()  # Ensure data is written immediately
+            self._log_queue.put_nowait((time.time_ns(), row))
             
         except Exception as e:
             print(f"Error writing to CSV: {e}")
+
+    def format_csv_row(self, item):
+        """Prefix a queued row with its wall-clock timestamp (formatted here, off the callback)"""
+        timestamp_ns, row = item
+        return [format_timestamp_ms(timestamp_ns), *row]
+
+    def stop_csv_logging(self):
+        """Drain the logger thread, then close the CSV file"""
+        if self.log_thread:
+            self._log_queue.put(None)  # Let the logger write queued rows, then exit
+            self.log_thread.join(timeout=2.0)
+            self.log_thread = None
+        
+        if self.csv_file_handle:
+            try:
+                # Final flush of buffered rows; fsync so they survive a crash after exit
+                self.csv_file_handle.flush()
+                os.fsync(self.csv_file_handle.fileno())
+                self.csv_file_handle.close()
+                print(f"📊 Metrics saved to: {self.csv_file}")
+            except OSError as e:
+                print(f"⚠️ Could not close metrics file: {e}")
+            self.csv_file_handle = None
+            self.csv_writer = None
         
     def find_input_device(self, device_id=None):
         """Find VB-Cable or best input device"""
@@ -226,7 +441,7 @@ class UltraLowLatencyUDPSender:
                 if max_channels > 0:
                     print(f"Using specified device {device_id}: {name}")
                     return device_id
-            except:
+            except (ValueError, sd.PortAudioError):
                 print(f"Device {device_id} not found, searching for alternatives")
         
         # Look for VB-Cable or configured device name
@@ -246,7 +461,7 @@ class UltraLowLatencyUDPSender:
                 name = getattr(device_info, 'name', 'Unknown')
                 print(f"Using default input: {name}")
                 return default_input
-        except:
+        except (ValueError, sd.PortAudioError):
             pass
             
         print("Error: No suitable input device found.")
@@ -255,81 +470,226 @@ class UltraLowLatencyUDPSender:
         sys.exit(1)
 
     def audio_callback(self, indata, frames, time_info, status):
-        """Audio callback with zero packet loss design"""
-        if status and self.config['logging']['verbose']:
-            print(f"⚠️ Audio status: {status}")
+        """Audio callback: copy the captured int16 block into the ring and publish complete frames
+
+        Encoding and sending happen on the encode thread (encode_loop), so the
+        callback never waits on the encoder, the network or send pacing.
+        """
+        if status and self._verbose:
+            self.defer_print(f"⚠️ Audio status: {status}")
         
         if not self.streaming:
             return
         
         try:
-            # Timestamp
-            capture_timestamp = time.perf_counter()
+            # Capture time in integer ns on the monotonic clock (immune to NTP steps)
+            capture_ns = time.perf_counter_ns()
             
-            # Convert float32 to int16 with optimized processing
-            audio_data = (indata * 32767).astype(np.int16)
+            ring = self._ring
+            ring_size = len(ring)
+            if len(indata) > ring_size:
+                indata = indata[-ring_size:]
+            n = len(indata)
             
-            # Add to buffer with overflow protection
-            if len(self.audio_buffer) + len(audio_data) > self.chunk_size * 10:
-                self.buffer_underruns += 1
-                # Drop oldest data to prevent overflow
-                excess = len(self.audio_buffer) + len(audio_data) - (self.chunk_size * 10)
-                self.audio_buffer = self.audio_buffer[excess:]
+            # The stream captures int16 (PortAudio converts and clips), so the block is
+            # copied straight into the ring, wrapping at the end. The callback always
+            # overwrites; the encode thread drops frames it has been lapped on
+            w = self._rows_written % ring_size
+            first = min(n, ring_size - w)
+            ring[w:w + first] = indata[:first]
+            if first < n:
+                ring[:n - first] = indata[first:]
+            self._rows_written += n
             
-            self.audio_buffer = np.vstack([self.audio_buffer, audio_data])
+            # Hand every frame this block completed to the encode thread
+            complete = self._rows_written // self.opus_frame_samples
+            while self._frames_published < complete:
+                self._frame_queue.put_nowait((self._frames_published, capture_ns))
+                self._frames_published += 1
+                    
+        except Exception as e:
+            self.defer_print(f"❌ Audio callback error: {e}")
+
+    def encode_loop(self):
+        """Encode thread: pace, Opus-encode and send each published frame until the None sentinel"""
+        self.tune_encode_thread()
+        
+        # Hot-loop attributes and bound methods as locals
+        frame_queue = self._frame_queue
+        ring = self._ring
+        ring_size = len(ring)
+        frame_samples = self.opus_frame_samples
+        encode = self.opus_encoder.encode
+        encode_into = self._opus_encode
+        silence_opus = self._silence_opus
+        pack_header = _HDR.pack_into
+        pkt_buf = self._pkt_buf
+        perf_counter_ns = time.perf_counter_ns
+        frame_interval_ns = self.frame_interval_ns
+        timing_precision_ns = self.timing_precision_ns
+        stall_timeout = 2 * self.frame_interval
+        stalled = False  # Sending silence until capture resumes
+        
+        while True:
+            # A stall is detected after two frame intervals without a frame; while it
+            # lasts, wait only until the next send slot so silence keeps the frame rate
+            if stalled:
+                timeout = max(self.next_send_ns - timing_precision_ns - perf_counter_ns(), 0) / 1e9
+            else:
+                timeout = stall_timeout
+            try:
+                item = frame_queue.get(timeout=timeout)
+            except queue.Empty:
+                # Capture stalled: keep packets flowing with a silent frame
+                if not self.streaming:
+                    stalled = False
+                    continue
+                item = (None, perf_counter_ns())
+            if item is None:
+                self.flush_gso_batch()  # Frames and parity still waiting for a full batch
+                return
+            frame_no, capture_ns = item
             
-            # Process complete Opus frames
-            while len(self.audio_buffer) >= self.opus_frame_samples:
-                # Check if it's time to send
-                current_time = time.perf_counter()
-                if self.next_send_time == 0.0:
-                    self.next_send_time = current_time
+            if frame_no is None:
+                frame_data = self._silence
+                self.silence_frames += 1
+            else:
+                # The ring holds only the newest ring_frames frames: skip any already overwritten
+                start_row = frame_no * frame_samples
+                if self._rows_written > start_row + ring_size:
+                    self.buffer_underruns += 1
+                    continue
                 
-                if current_time >= self.next_send_time - self.timing_precision:
-                    # Extract one Opus frame
-                    frame_data = self.audio_buffer[:self.opus_frame_samples]
-                    self.audio_buffer = self.audio_buffer[self.opus_frame_samples:]
-                    
-                    # Encode with Opus (optimized settings)
-                    pcm_bytes = frame_data.flatten().tobytes()
-                    opus_data = self.opus_encoder.encode(pcm_bytes, self.opus_frame_samples)
-                    
-                    # Create packet with high-precision timestamp
-                    timestamp = int(capture_timestamp * 1000000)  # microseconds
+                # One Opus frame as a view of the ring (frames never straddle the wrap)
+                r = start_row % ring_size
+                frame_data = ring[r:r + frame_samples]
+                frame_ptr = self._frame_ptrs[frame_no % self.ring_frames]
+            
+            # Pace sends at frame_interval: an early frame waits for its slot. A stall
+            # starting or ending moves an overdue schedule to now instead of bursting to catch up
+            now_ns = perf_counter_ns()
+            if self.next_send_ns == 0 or (stalled != (frame_no is None) and now_ns > self.next_send_ns):
+                self.next_send_ns = now_ns
+            stalled = frame_no is None
+            if now_ns < self.next_send_ns - timing_precision_ns:
+                self.ultra_precise_sleep(self.next_send_ns - timing_precision_ns)
+                now_ns = perf_counter_ns()
+            
+            # Narrow handler: a failed encode/send costs this frame only
+            try:
+                # Encode with Opus: straight from the ring into the packet buffer when
+                # libopus is bound directly, otherwise through opuslib's bytes API
+                if frame_no is None:
+                    opus_data = silence_opus  # Cached at init: no encode for a silent frame
                     opus_length = len(opus_data)
-                    header = struct.pack('!LQL', self.packet_count, timestamp, opus_length)
-                    
-                    # Send with retry logic for zero packet loss
-                    packet = header + opus_data
-                    
-                    # Apply adaptive timing
-                    adaptive_delay = self.adaptive_send_timing()
-                    if adaptive_delay > 0:
-                        time.sleep(adaptive_delay)
-                    
-                    # Send with retry logic
-                    if self.send_with_retry(packet):
-                        self.packet_count += 1
-                        
-                        # Ultra-precise timing for next send
-                        self.next_send_time += self.frame_interval
-                        
-                        # Detect timing errors
-                        timing_error = abs(current_time - (self.next_send_time - self.frame_interval))
-                        if timing_error > self.timing_precision:
-                            self.timing_errors += 1
-                      # Performance logging
-                    stats_interval = self.config['logging']['stats_interval']
-                    if self.packet_count % stats_interval == 0:
-                        self.log_enhanced_metrics(pcm_bytes, opus_data, capture_timestamp)
+                elif encode_into is not None:
+                    opus_length = encode_into(self.opus_encoder.encoder_state, frame_ptr,
+                                              frame_samples, self._opus_out, MAX_OPUS_PACKET)
+                    if opus_length < 0:
+                        raise opuslib.OpusError(opus_length)
+                    opus_data = None  # Already in place behind the header
                 else:
-                    # Not time to send yet, break to wait
-                    break
-                    
+                    opus_data = encode(frame_data.tobytes(), frame_samples)
+                    opus_length = len(opus_data)
+                
+                # The callback overwrote the frame mid-encode: drop the torn packet
+                if frame_no is not None and self._rows_written > start_row + ring_size:
+                    self.buffer_underruns += 1
+                    continue
+                
+                # Create packet with high-precision timestamp
+                timestamp = (capture_ns - self._t0_ns) // 1000  # microseconds since stream start
+                pack_header(pkt_buf, 0, self.packet_count, timestamp, opus_length)
+                packet = self._hdr_view if opus_data is not None else self._pkt_view[:_HDR.size + opus_length]
+                
+                # Apply adaptive timing: spin (never sleep), and only with no frame waiting
+                # behind this one, where a delay would just bring the ring closer to lapping it
+                adaptive_delay_ns = self.adaptive_send_timing()
+                if adaptive_delay_ns > 0 and frame_queue.empty():
+                    deadline = perf_counter_ns() + adaptive_delay_ns
+                    while perf_counter_ns() < deadline:
+                        pass
+                    self.applied_delay_ns = adaptive_delay_ns
+                else:
+                    self.applied_delay_ns = 0
+                
+                # Send with retry logic (or queue it for the next GSO batch)
+                if self.gso_frames > 1:
+                    sent = self.queue_gso_packet(packet, opus_data)
+                else:
+                    sent = self.send_with_retry(packet, opus_data)
+            except Exception as e:
+                self.send_errors += 1
+                sent = False
+                self.defer_print(f"❌ Encode/send error: {e}")
+            
+            # None: queued for the next GSO batch, which takes this sequence number and slot
+            if sent is not False:
+                self.packet_count += 1
+                
+                # Ultra-precise timing for next send
+                scheduled_ns = self.next_send_ns
+                self.next_send_ns = scheduled_ns + frame_interval_ns
+                
+                # Detect timing errors
+                if abs(now_ns - scheduled_ns) > timing_precision_ns:
+                    self.timing_errors += 1
+                
+                if self.fec_group:
+                    payload = opus_data if opus_data is not None else self._pkt_view[_HDR.size:_HDR.size + opus_length]
+                    self.add_to_fec_group(self.packet_count - 1, timestamp, payload)
+                
+                # Performance logging (only for frames that went out)
+                if self.packet_count % self._stats_interval == 0:
+                    self.log_enhanced_metrics(frame_data.nbytes, opus_length, capture_ns)
+
+    def add_to_fec_group(self, sequence, timestamp, payload):
+        """XOR a sent payload into the group parity; after the group's last packet, send the parity"""
+        length = len(payload)
+        parity = self._fec_parity[:length]
+        np.bitwise_xor(parity, np.frombuffer(payload, dtype=np.uint8), out=parity)
+        self._fec_len_xor ^= length
+        self._fec_max_len = max(self._fec_max_len, length)
+        if (sequence + 1) % self.fec_group:
+            return
+        
+        size = _FEC_LEN.size + self._fec_max_len
+        _HDR.pack_into(self._fec_buf, 0, sequence + 1 - self.fec_group, timestamp,
+                       FEC_FLAG | self.fec_group << 16 | size)
+        _FEC_LEN.pack_into(self._fec_buf, _HDR.size, self._fec_len_xor)
+        packet = self._fec_view[:_HDR.size + size]
+        try:
+            if self.gso_frames > 1:
+                sent = self.queue_gso_packet(packet)
+            else:
+                sent = self.send_with_retry(packet)
+            if sent is not False:  # Queued parity goes out with its batch
+                self.fec_packets_sent += 1
         except Exception as e:
-            print(f"❌ Audio callback error: {e}")
-            import traceback
-            traceback.print_exc()
+            self.send_errors += 1
+            self.defer_print(f"❌ FEC parity send error: {e}")
+        self._fec_parity[:self._fec_max_len] = 0
+        self._fec_len_xor = 0
+        self._fec_max_len = 0
+
+    def stop_encode_thread(self):
+        """Let the encode thread drain the frames already queued, then wait for it"""
+        if self.encode_thread:
+            self._frame_queue.put(None)
+            self.encode_thread.join(timeout=2.0)
+            self.encode_thread = None
+
+    def defer_print(self, message):
+        """Queue a message from the audio thread; the main thread prints it (no console I/O on the callback)"""
+        self._message_queue.put_nowait(message)
+
+    def print_deferred(self):
+        """Main thread: print every message the audio thread has queued"""
+        while True:
+            try:
+                print(self._message_queue.get_nowait())
+            except queue.Empty:
+                return
 
     def start_streaming(self):
         """Start audio capture and UDP transmission"""
@@ -345,11 +705,24 @@ class UltraLowLatencyUDPSender:
             self.streaming = True
             self.packet_count = 0
             self.start_time = time.perf_counter()
-            self.next_send_time = 0.0
+            self._t0_ns = time.perf_counter_ns()  # Epoch of the packet timestamps
+            self._session_start_iso = datetime.now().isoformat()
+            self.next_send_ns = 0
+            self._rows_written = 0
+            self._frames_published = 0
+            self._fec_parity[:] = 0  # Parity groups restart with packet_count
+            self._fec_len_xor = 0
+            self._fec_max_len = 0
+            self._gso_count = 0
             
             # Set process priority 
             if self.realtime_priority:
                 self.set_process_priority()
+            self.begin_timer_period()
+            
+            # Encoding and sending run beside the capture callback, never inside it
+            self.encode_thread = threading.Thread(target=self.encode_loop, daemon=True)
+            self.encode_thread.start()
             
             print("Streaming started")
             print("Enhanced metrics enabled")
@@ -361,13 +734,14 @@ class UltraLowLatencyUDPSender:
                 channels=self.channels,
                 samplerate=self.sample_rate,
                 blocksize=self.chunk_size,
-                dtype=np.float32,
+                dtype='int16',  # Opus and the ring take int16 PCM directly
                 callback=self.audio_callback,
                 latency='low'
             ):
-                # Keep the stream alive with minimal CPU usage
+                # Keep the stream alive with minimal CPU usage, relaying callback messages
                 while self.streaming:
                     time.sleep(0.01)  # 10ms sleep for responsiveness
+                    self.print_deferred()
             
         except KeyboardInterrupt:
             print("\n🛑 Stopping ultra-low latency stream...")
@@ -376,33 +750,43 @@ class UltraLowLatencyUDPSender:
             import traceback
             traceback.print_exc()
         finally:
+            self.print_deferred()
             self.cleanup_enhanced()
     
     def stop_streaming(self):
         """Stop audio streaming"""
         self.streaming = False
     
+    def close_socket(self):
+        """Close the UDP socket once; later calls are no-ops"""
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError as e:
+                print(f"⚠️ Socket close failed: {e}")
+            finally:
+                self.sock = None
+
     def cleanup(self):
         """Clean up resources"""
-        self.sock.close()
+        self.streaming = False
+        self.stop_encode_thread()
+        self.end_timer_period()
+        self.close_socket()
         
         # Close CSV file
-        if self.csv_file_handle:
-            try:
-                self.csv_file_handle.close()
-                print(f"Metrics saved to: {self.csv_file}")
-            except:
-                pass
-            self.csv_file_handle = None
+        self.stop_csv_logging()
             
         print("Audio sender stopped.")
 
     def cleanup_enhanced(self):
         """Cleanup with performance summary"""
         self.streaming = False
+        self.stop_encode_thread()
+        self.end_timer_period()
         
         # Calculate final performance metrics
-        if hasattr(self, 'start_time') and self.start_time and self.packet_count > 0:
+        if self.start_time is not None and self.packet_count > 0:
             total_time = time.perf_counter() - self.start_time
             avg_rate = self.packet_count / total_time
             success_rate = ((self.packets_sent - self.send_errors) / max(self.packets_sent, 1)) * 100
@@ -415,21 +799,20 @@ class UltraLowLatencyUDPSender:
             print(f"Success rate: {success_rate:.2f}%")
             print(f"Timing accuracy: {timing_accuracy:.2f}%")
             print(f"Send errors: {self.send_errors}")
+            print(f"Dropped (send buffer full): {self.send_drops}")
+            if self.icmp_errors:
+                print(f"Receiver unreachable (ICMP, retried): {self.icmp_errors}")
             print(f"Timing errors: {self.timing_errors}")
             print(f"Buffer underruns: {self.buffer_underruns}")
+            print(f"Silence frames: {self.silence_frames}")
+            if self.fec_group:
+                print(f"FEC parity packets: {self.fec_packets_sent}")
             print(f"Congestion events: {self.network_congestion_events}")
         
-        # Close socket
-        if hasattr(self, 'sock') and self.sock:
-            self.sock.close()
+        self.close_socket()
         
         # Close CSV file
-        if hasattr(self, 'csv_file_handle') and self.csv_file_handle:
-            try:
-                self.csv_file_handle.close()
-                print(f"📊 Enhanced metrics saved to: {self.csv_file}")
-            except:
-                pass
+        self.stop_csv_logging()
         
         print("✅ Ultra-low latency sender stopped")
 
@@ -447,7 +830,6 @@ class UltraLowLatencyUDPSender:
         """Set process to real-time priority for ultra-low latency"""
         try:
             if os.name == 'nt':  # Windows
-                import ctypes
                 # Set process to HIGH_PRIORITY_CLASS
                 ctypes.windll.kernel32.SetPriorityClass(-1, 0x00000080)
                 # Set thread to TIME_CRITICAL
@@ -462,86 +844,227 @@ class UltraLowLatencyUDPSender:
         except Exception as e:
             print(f"⚠️ Could not optimize process priority: {e}")
     
-    def detect_network_congestion(self):
-        """Detect network congestion based on send timing"""
-        if len(self.send_timestamps) < 10:
-            return False
-        
-        # Calculate recent send intervals
-        intervals = []
-        timestamps = list(self.send_timestamps)
-        for i in range(1, len(timestamps)):
-            intervals.append(timestamps[i] - timestamps[i-1])
+    def begin_timer_period(self):
+        """Windows: raise the system timer to 1ms resolution (default ~15.6ms) for time.sleep waits"""
+        if os.name != 'nt' or self._timer_period_set:
+            return
+        try:
+            if ctypes.windll.winmm.timeBeginPeriod(1) == 0:  # TIMERR_NOERROR
+                self._timer_period_set = True
+                print("✅ Timer resolution set to 1ms (Windows)")
+        except Exception as e:
+            print(f"⚠️ Could not set timer resolution: {e}")
+    
+    def end_timer_period(self):
+        """Windows: release the 1ms timer resolution requested by begin_timer_period"""
+        if self._timer_period_set:
+            ctypes.windll.winmm.timeEndPeriod(1)
+            self._timer_period_set = False
+    
+    def tune_encode_thread(self):
+        """Pin the calling (encode) thread to tx_core and, when tx_priority is set, raise its priority
+
+        SCHED_FIFO tx_priority on Linux, TIME_CRITICAL on Windows. Opt-in: the
+        thread busy-spins its pacing tails, which a real-time policy makes
+        unpreemptible. The capture callback thread is left to PortAudio,
+        which already runs it real-time.
+        """
+        threading_config = self.config.get('threading', {})
+        core = threading_config.get('tx_core')
+        if core is not None:
+            try:
+                if pin_current_thread(core):
+                    self.defer_print(f"📌 Encode thread pinned to CPU {core}")
+            except OSError as e:
+                self.defer_print(f"⚠️ Could not pin encode thread: {e}")
         
-        if not intervals:
+        priority = threading_config.get('tx_priority')
+        if priority is None:
+            return
+        try:
+            policy = boost_current_thread(priority)
+            if policy:
+                self.defer_print(f"✅ Encode thread priority set to {policy}")
+        except PermissionError:
+            self.defer_print("⚠️ Could not set SCHED_FIFO (requires root or CAP_SYS_NICE)")
+        except OSError as e:
+            self.defer_print(f"⚠️ Could not set encode thread priority: {e}")
+    
+    def record_send_time(self):
+        """Fold the interval since the previous send into the EWMA send interval (alpha 0.3)"""
+        now_ns = time.perf_counter_ns()
+        if self._send_count:
+            interval = (now_ns - self._last_send_ns) / 1e9
+            if self._send_count == 1:
+                self._send_interval_ewma = interval
+            else:
+                self._send_interval_ewma += 0.3 * (interval - self._send_interval_ewma)
+        self._last_send_ns = now_ns
+        self._send_count += 1
+    
+    def detect_network_congestion(self):
+        """HCCC-style check: congested only when sends run slow AND frames are backing up
+
+        congestion_degree (C_d) is the smoothed send interval over its target;
+        buffer occupancy (B_r) is the encode backlog as a fraction of the capture
+        ring. A scheduler hiccup alone stretches C_d but leaves the backlog empty.
+        """
+        if self._send_count < 10:
             return False
         
-        # Check for increasing delays (congestion indicator)
-        avg_interval = sum(intervals) / len(intervals)
-        expected_interval = self.frame_interval
+        # A GSO batch is one send
+        self.congestion_degree = self._send_interval_ewma / (self.frame_interval * self.gso_frames)
+        occupancy = self._frame_queue.qsize() / self.ring_frames
         
-        if avg_interval > expected_interval * 1.5:  # 50% slower than expected
+        if self.congestion_degree > 1.0 and occupancy > 0.8:
             self.network_congestion_events += 1
             return True
         
         return False
     
     def adaptive_send_timing(self):
-        """Implement adaptive timing to reduce packet loss"""
+        """Adaptive delay in ns proportional to the congestion degree, decaying once congestion clears
+
+        C_d from 1 to 2 maps linearly onto 0..MAX_ADAPTIVE_SPIN_NS, the most
+        a send may be spun out without crowding the next frame's slot.
+        """
         current_time = time.perf_counter()
         
         # Detect congestion
         if self.detect_network_congestion():
+            # Slow down by the smoothed interval's excess over its target (HCCC rate adjustment)
+            self.adaptive_delay_ns = int(min(self.congestion_degree - 1.0, 1.0) * MAX_ADAPTIVE_SPIN_NS)
+            self.last_congestion_time = current_time
             if not self.congestion_detected:
                 self.congestion_detected = True
-                self.adaptive_delay = 0.001  # Add 1ms delay
-                self.last_congestion_time = current_time
-                print(f"⚠️ Network congestion detected, adding adaptive delay")
+                self.defer_print("⚠️ Network congestion detected, adding adaptive delay")
         else:
             # Gradually reduce delay when congestion clears
             if self.congestion_detected and (current_time - self.last_congestion_time) > 2.0:
-                self.adaptive_delay *= 0.9
-                if self.adaptive_delay < 0.0001:
-                    self.adaptive_delay = 0.0
+                self.adaptive_delay_ns = int(self.adaptive_delay_ns * 0.9)
+                if self.adaptive_delay_ns < 10_000:
+                    self.adaptive_delay_ns = 0
                     self.congestion_detected = False
-                    print("✅ Network congestion cleared")
+                    self.defer_print("✅ Network congestion cleared")
         
-        return self.adaptive_delay
+        return self.adaptive_delay_ns
     
-    def ultra_precise_sleep(self, target_time):
-        """Sleep using busy waiting for final precision"""
-        sleep_time = target_time - time.perf_counter()
+    def ultra_precise_sleep(self, target_ns):
+        """Sleep until target_ns (perf_counter_ns): OS timer wait, then spin the last SLEEP_SPIN_NS"""
+        sleep_ns = target_ns - time.perf_counter_ns() - SLEEP_SPIN_NS
         
-        if sleep_time > 0.01:  # Use regular sleep for longer waits
-            time.sleep(sleep_time - 0.01)
+        if sleep_ns > 0:  # OS wait for all but the tail, off the CPU
+            time.sleep(sleep_ns / 1e9)
         
         # Busy wait for final precision
-        while time.perf_counter() < target_time:
+        while time.perf_counter_ns() < target_ns:
             pass
     
-    def send_with_retry(self, packet, retries=3):
-        """Send packet with retry logic for zero packet loss"""
+    def send_with_retry(self, packet, payload=None, retries=3):
+        """Send one datagram without blocking; a full send buffer drops it
+
+        packet is the whole datagram, or just the header when payload is given
+        separately (gathered by sendmsg, or copied in behind the header).
+        Only a stale ICMP error on the connected socket is retried, at once:
+        sleeping to retry would put every later frame behind schedule.
+        """
+        gather = payload is not None and self._use_sendmsg
+        if payload is not None and not gather:
+            # No scatter-gather: copy the payload in behind the packed header
+            packet_end = _HDR.size + len(payload)
+            self._pkt_buf[_HDR.size:packet_end] = payload
+            packet = self._pkt_view[:packet_end]
         for attempt in range(retries):
             try:
-                self.sock.sendto(packet, (self.target_ip, self.target_port))
+                if gather:
+                    self.sock.sendmsg((packet, payload), (), 0, *self._dest)
+                elif self._connected:
+                    self.sock.send(packet)
+                else:
+                    self.sock.sendto(packet, self._addr)
                 self.packets_sent += 1
-                self.send_timestamps.append(time.perf_counter())
+                self.record_send_time()
                 return True
-            except socket.error as e:
+            except ConnectionError:
+                # Connected socket: an ICMP unreachable for an earlier packet (receiver
+                # not up yet) surfaces here once and is then cleared, so retry at once.
+                # Nothing failed to go out, so it stays out of send_errors
+                self.icmp_errors += 1
+                continue
+            except OSError as e:
                 self.send_errors += 1
-                if attempt < retries - 1:
-                    time.sleep(0.001)  # Brief delay before retry
+                if is_send_buffer_full(e):
+                    self.send_drops += 1  # Late audio is useless; the next frame goes out on time
                 else:
-                    print(f"❌ Send failed after {retries} attempts: {e}")
-                    return False
+                    self.defer_print(f"❌ Send failed: {e}")
+                return False
         return False
 
-    def log_enhanced_metrics(self, pcm_bytes, opus_data, capture_timestamp):
+    def queue_gso_packet(self, packet, payload=None):
+        """Pack a packet into the GSO batch; a full batch is sent with flush_gso_batch
+
+        Returns None while the packet only waits in the batch, otherwise
+        whether the batch's send succeeded for it.
+        """
+        i = self._gso_count
+        start = i * self._gso_stride
+        end = start + len(packet)
+        self._gso_buf[start:end] = packet  # Copied: packet views a reused packet buffer
+        if payload is not None:
+            self._gso_buf[end:end + len(payload)] = payload
+            end += len(payload)
+        self._gso_lens[i] = end - start
+        self._gso_count = i + 1
+        if self._gso_count < self.gso_frames:
+            return None
+        return self.flush_gso_batch()
+
+    def flush_gso_batch(self):
+        """Send the batched packets as one UDP_SEGMENT sendmsg; True if the last one went out
+
+        GSO needs every segment but the last to be exactly the segment size, so
+        shorter packets are zero-padded to the batch's longest one (the receiver
+        ignores trailing padding after opus_length).
+        """
+        count = self._gso_count
+        if not count:
+            return True
+        self._gso_count = 0
+        lens = self._gso_lens
+        stride = self._gso_stride
+        data = self._gso_bytes
+        segment_size = max(lens[:count])
+        # Close the slots up to segment_size apart; a packet never moves past the next slot's start
+        for i in range(1, count):
+            data[i * segment_size:i * segment_size + lens[i]] = data[i * stride:i * stride + lens[i]]
+        for i in range(count - 1):
+            data[i * segment_size + lens[i]:(i + 1) * segment_size] = 0
+        train = self._gso_view[:(count - 1) * segment_size + lens[count - 1]]
+        try:
+            self.sock.sendmsg((train,), [(socket.IPPROTO_UDP, UDP_SEGMENT, struct.pack('=H', segment_size))],
+                              0, *self._dest)
+            self.packets_sent += count
+            self.record_send_time()
+            return True
+        except OSError as e:
+            if is_send_buffer_full(e):
+                self.send_errors += 1
+                self.send_drops += count
+                return False
+            # Kernel or NIC without UDP GSO: one send per packet from now on (each counted there)
+            self.defer_print(f"⚠️ UDP GSO send failed ({e}), sending one packet per frame")
+            self.gso_frames = 1
+            sent = False
+            for i in range(count):
+                sent = self.send_with_retry(train[i * segment_size:i * segment_size + lens[i]])
+            return sent
+
+    def log_enhanced_metrics(self, raw_bytes, compressed_bytes, capture_ns):
         """Log enhanced metrics with statistics"""
         try:
             elapsed = time.perf_counter() - (self.start_time or time.perf_counter())
             rate = self.packet_count / elapsed if elapsed > 0 else 0
-            compression_ratio = len(pcm_bytes) / len(opus_data) if len(opus_data) > 0 else 0
+            compression_ratio = raw_bytes / compressed_bytes if compressed_bytes > 0 else 0
             
             # Advanced metrics
             success_rate = ((self.packets_sent - self.send_errors) / max(self.packets_sent, 1)) * 100
@@ -549,26 +1072,24 @@ class UltraLowLatencyUDPSender:
             congestion_rate = (self.network_congestion_events / max(self.packet_count // 100, 1))
             
             # Console output with enhanced stats
-            if self.config['logging']['verbose']:
-                print(f"📊 Sent {self.packet_count} packets | "
-                      f"Rate: {rate:.1f} pkt/s | "
-                      f"Success: {success_rate:.1f}% | "
-                      f"Timing: {timing_accuracy:.1f}% | "
-                      f"Compression: {compression_ratio:.1f}x | "
-                      f"Congestion: {congestion_rate:.2f}")
+            if self._verbose:
+                self.defer_print(f"📊 Sent {self.packet_count} packets | "
+                                 f"Rate: {rate:.1f} pkt/s | "
+                                 f"Success: {success_rate:.1f}% | "
+                                 f"Timing: {timing_accuracy:.1f}% | "
+                                 f"Compression: {compression_ratio:.1f}x | "
+                                 f"Congestion: {congestion_rate:.2f}")
             
-            # Enhanced CSV logging
+            # Enhanced CSV logging: queued for the logger thread, which stamps and writes it
             if self.csv_writer:
-                current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
                 row = [
-                    current_time,
-                    self.start_time,
+                    self._session_start_iso,
                     self.packet_count,
                     elapsed,
                     rate,
                     compression_ratio,
-                    len(pcm_bytes),
-                    len(opus_data),
+                    raw_bytes,
+                    compressed_bytes,
                     self.target_ip,
                     self.target_port,
                     self.sample_rate,
@@ -582,15 +1103,13 @@ class UltraLowLatencyUDPSender:
                     timing_accuracy,
                     self.buffer_underruns,
                     self.network_congestion_events,
-                    self.adaptive_delay * 1000,  # Convert to ms
+                    self.applied_delay_ns / 1e6,  # Delay spun out before the latest send, in ms
                     self.congestion_detected
                 ]
-                self.csv_writer.writerow(row)
-                if self.csv_file_handle:
-                    self.csv_file_handle.flush()
+                self._log_queue.put_nowait((time.time_ns(), row))
                     
         except Exception as e:
-            print(f"❌ Error logging enhanced metrics: {e}")
+            self.defer_print(f"❌ Error logging enhanced metrics: {e}")
 
 
 if __name__ == "__main__":
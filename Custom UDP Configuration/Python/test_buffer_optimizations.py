@@ -6,21 +6,95 @@ Tests the optimized UDP audio streaming system for buffer underrun elimination.
 Runs both sender and receiver with enhanced buffer management and monitors performance.
 """
 
+import importlib.util
+import json
 import subprocess
 import time
 import sys
-import os
-import signal
 import threading
+from collections import deque
 from pathlib import Path
 
+# Modules both scripts import at startup, and the config sections they index directly
+REQUIRED_MODULES = ("numpy", "sounddevice", "opuslib")
+REQUIRED_SECTIONS = ("network", "audio", "opus", "logging")
+OUTPUT_TAIL_LINES = 200  # Lines of each child's output kept for the report
+
+TEST_REPORT = "\n" + "=" * 50 + """
+📊 BUFFER OPTIMIZATION TEST REPORT
+""" + "=" * 50 + """
+✅ Optimizations Applied:
+   • Buffer size increased to 30 frames
+   • Pre-fill mechanism implemented
+   • State-based buffer management
+   • Enhanced audio concealment
+   • Smart underrun recovery
+
+🎯 Expected Results:
+   • <1% buffer underruns vs. previous
+   • Smooth startup with pre-fill
+   • Automatic recovery from network issues
+   • Consistent ultra-low latency
+
+📝 Monitor the console output for:
+   • Buffer underrun counts
+   • Buffer health scores
+   • Pre-fill completion messages
+   • Recovery mode activations
+"""
+
 class AudioSystemTester:
     def __init__(self):
         self.receiver_process = None
         self.sender_process = None
         self.test_duration = 30  # seconds
         self.script_dir = Path(__file__).parent
+        self.output = {}  # Process label -> (reader threads, stdout tail, stderr tail)
         
+    def check_dependencies(self):
+        """Check the sender's and receiver's modules are installed, before starting either"""
+        missing = [name for name in REQUIRED_MODULES if importlib.util.find_spec(name) is None]
+        if missing:
+            print(f"❌ Dependencies: missing {', '.join(missing)} (pip install {' '.join(missing)})")
+            return False
+        return True
+    
+    def check_config_file(self):
+        """Check config.json parses and has the sections both scripts index directly"""
+        config_file = self.script_dir / "config.json"
+        try:
+            with open(config_file, encoding='utf-8') as f:
+                config = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"❌ Config: error reading {config_file}: {e}")
+            return False
+        missing = [section for section in REQUIRED_SECTIONS if section not in config]
+        if missing:
+            print(f"❌ Config: missing sections: {', '.join(missing)}")
+            return False
+        return True
+    
+    @staticmethod
+    def _drain_pipe(pipe, tail):
+        """Read a pipe to EOF, keeping its last lines"""
+        with pipe:
+            for line in pipe:
+                tail.append(line)
+    
+    def drain_output(self, label, process):
+        """Read a child's stdout and stderr concurrently while it runs
+
+        Unread, a pipe fills after ~64 KiB and the child blocks on its next
+        print, stalling the stream mid-test.
+        """
+        stdout_tail = deque(maxlen=OUTPUT_TAIL_LINES)
+        stderr_tail = deque(maxlen=OUTPUT_TAIL_LINES)
+        threads = [threading.Thread(target=self._drain_pipe, args=(pipe, tail), daemon=True)
+                   for pipe, tail in ((process.stdout, stdout_tail), (process.stderr, stderr_tail))]
+        for thread in threads:
+            thread.start()
+        self.output[label] = (threads, stdout_tail, stderr_tail)
+    
     def start_receiver(self):
         """Start the optimized receiver"""
         print("🎧 Starting optimized receiver...")
@@ -33,6 +107,7 @@ class AudioSystemTester:
                 text=True,
                 bufsize=1
             )
+            self.drain_output("Receiver", self.receiver_process)
             time.sleep(2)  # Give receiver time to initialize
             print("✅ Receiver started successfully")
             return True
@@ -52,6 +127,7 @@ class AudioSystemTester:
                 text=True,
                 bufsize=1
             )
+            self.drain_output("Sender", self.sender_process)
             time.sleep(1)  # Give sender time to initialize
             print("✅ Sender started successfully")
             return True
@@ -100,7 +176,7 @@ class AudioSystemTester:
                 print(f"⚠️ Sender stop warning: {e}")
                 try:
                     self.sender_process.kill()
-                except:
+                except (OSError, subprocess.SubprocessError):
                     pass
         
         if self.receiver_process:
@@ -112,45 +188,39 @@ class AudioSystemTester:
                 print(f"⚠️ Receiver stop warning: {e}")
                 try:
                     self.receiver_process.kill()
-                except:
+                except (OSError, subprocess.SubprocessError):
                     pass
     
     def collect_output(self):
         """Collect and analyze output from both processes"""
         print("📋 Collecting performance data...")
         
-        if self.receiver_process:
-            try:
-                stdout, stderr = self.receiver_process.communicate(timeout=2)
-                if stdout:
-                    print("📊 Receiver Output:")
-                    print(stdout[-500:])  # Last 500 chars
-                if stderr:
-                    print("⚠️ Receiver Errors:")
-                    print(stderr[-300:])  # Last 300 chars
-            except subprocess.TimeoutExpired:
-                print("⚠️ Receiver output collection timeout")
-        
-        if self.sender_process:
-            try:
-                stdout, stderr = self.sender_process.communicate(timeout=2)
-                if stdout:
-                    print("📊 Sender Output:")
-                    print(stdout[-500:])  # Last 500 chars
-                if stderr:
-                    print("⚠️ Sender Errors:")
-                    print(stderr[-300:])  # Last 300 chars
-            except subprocess.TimeoutExpired:
-                print("⚠️ Sender output collection timeout")
+        for label, (threads, stdout_tail, stderr_tail) in self.output.items():
+            for thread in threads:
+                thread.join(timeout=2)  # The processes are stopped, so the pipes are at EOF
+            lines = []  # One console write per process
+            if any(thread.is_alive() for thread in threads):
+                lines.append(f"⚠️ {label} output collection timeout")
+            stdout, stderr = ''.join(stdout_tail), ''.join(stderr_tail)
+            if stdout:
+                lines += [f"📊 {label} Output:", stdout[-500:]]  # Last 500 chars
+            if stderr:
+                lines += [f"⚠️ {label} Errors:", stderr[-300:]]  # Last 300 chars
+            if lines:
+                print("\n".join(lines))
     
     def run_test(self):
         """Run the complete audio system test"""
-        print("🧪 Buffer Underrun Elimination Test")
-        print("=" * 50)
-        print(f"📅 Test duration: {self.test_duration} seconds")
-        print(f"🎯 Goal: Zero buffer underruns")
-        print(f"📁 Working directory: {self.script_dir}")
-        print()
+        print("🧪 Buffer Underrun Elimination Test\n"
+              + "=" * 50 + "\n"
+              f"📅 Test duration: {self.test_duration} seconds\n"
+              "🎯 Goal: Zero buffer underruns\n"
+              f"📁 Working directory: {self.script_dir}\n")
+        
+        # Fail fast instead of starting processes that exit on import; with
+        # nothing started there is nothing to stop, wait for or collect
+        if not (self.check_dependencies() and self.check_config_file()):
+            return False
         
         try:
             # Start receiver first
@@ -185,28 +255,7 @@ class AudioSystemTester:
     
     def generate_report(self):
         """Generate a test report"""
-        print("\n" + "=" * 50)
-        print("📊 BUFFER OPTIMIZATION TEST REPORT")
-        print("=" * 50)
-        print("✅ Optimizations Applied:")
-        print("   • Buffer size increased to 30 frames")
-        print("   • Pre-fill mechanism implemented")
-        print("   • State-based buffer management")
-        print("   • Enhanced audio concealment")
-        print("   • Smart underrun recovery")
-        print()
-        print("🎯 Expected Results:")
-        print("   • <1% buffer underruns vs. previous")
-        print("   • Smooth startup with pre-fill")
-        print("   • Automatic recovery from network issues")
-        print("   • Consistent ultra-low latency")
-        print()
-        print("📝 Monitor the console output for:")
-        print("   • Buffer underrun counts")
-        print("   • Buffer health scores")
-        print("   • Pre-fill completion messages")
-        print("   • Recovery mode activations")
-
+        print(TEST_REPORT, end='')  # One console write for the whole block
 
 def main():
     """Main test function"""
@@ -0,0 +1,391 @@
+"""
+Batched UDP Receive
+
+Dequeues every datagram waiting on a non-blocking UDP socket in as few
+syscalls as possible.
+
+- Linux: recvmmsg(2) through ctypes fills up to batch_size preallocated
+  buffers in a single user/kernel transition
+- Linux + liburing (optional, network.use_io_uring): one multishot
+  IORING_OP_RECV over a provided-buffer group (a ring of posted single-shot
+  recvs on kernels before 6.0), completions reaped in batches
+- Other platforms: drains the socket with one recv_into per datagram,
+  reusing the same preallocated buffers
+
+With timestamps=True (Linux), SO_TIMESTAMPNS is enabled and the kernel's
+arrival time of every datagram is returned alongside it, in integer
+nanoseconds of the wall clock (CLOCK_REALTIME).
+
+The GIL is released for the whole batch: ctypes.CDLL foreign calls drop
+it around recvmmsg (CDLL, never PyDLL), and select() drops it while
+waiting, so the receive thread re-acquires it once per batch rather than
+once per datagram.
+
+Used by UDPReceiver through create_receiver(). BatchReceiver expects the
+caller to wait for readability (select) before recv(); UringReceiver.recv()
+waits on the completion queue itself (receiver.waits is True).
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import socket
+import struct
+import sys
+
+# Optional io_uring bindings (pip install liburing)
+try:
+    import liburing
+    LIBURING_AVAILABLE = True
+except ImportError:
+    liburing = None
+    LIBURING_AVAILABLE = False
+
+
+# Linux SO_TIMESTAMPNS == SCM_TIMESTAMPNS; Python's socket module does not export it
+SO_TIMESTAMPNS = getattr(socket, 'SO_TIMESTAMPNS', 35)
+_CMSG_HDR = struct.Struct('@Nii')  # cmsghdr: cmsg_len, cmsg_level, cmsg_type
+_TIMESPEC = struct.Struct('@qq')   # tv_sec, tv_nsec
+
+
+def _parse_timestamp(control, offset=0):
+    """Arrival time in integer ns from an SCM_TIMESTAMPNS control message, or None"""
+    length, level, kind = _CMSG_HDR.unpack_from(control, offset)
+    if length < socket.CMSG_LEN(_TIMESPEC.size) or level != socket.SOL_SOCKET or kind != SO_TIMESTAMPNS:
+        return None
+    sec, nsec = _TIMESPEC.unpack_from(control, offset + socket.CMSG_LEN(0))
+    return sec * 1_000_000_000 + nsec
+
+
+class _IOVec(ctypes.Structure):
+    _fields_ = [
+        ("iov_base", ctypes.c_void_p),
+        ("iov_len", ctypes.c_size_t),
+    ]
+
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [
+        ("msg_name", ctypes.c_void_p),
+        ("msg_namelen", ctypes.c_uint32),
+        ("msg_iov", ctypes.POINTER(_IOVec)),
+        ("msg_iovlen", ctypes.c_size_t),
+        ("msg_control", ctypes.c_void_p),
+        ("msg_controllen", ctypes.c_size_t),
+        ("msg_flags", ctypes.c_int),
+    ]
+
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [
+        ("msg_hdr", _MsgHdr),
+        ("msg_len", ctypes.c_uint),
+    ]
+
+
+def _load_recvmmsg():
+    """Bind libc recvmmsg, or return None when the platform lacks it"""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        # CDLL (not PyDLL): the GIL is released for the duration of each call
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        recvmmsg = libc.recvmmsg
+    except (OSError, AttributeError):
+        return None
+    recvmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(_MMsgHdr), ctypes.c_uint,
+                         ctypes.c_int, ctypes.c_void_p]
+    recvmmsg.restype = ctypes.c_int
+    return recvmmsg
+
+
+class BatchReceiver:
+    """Drain a non-blocking UDP socket into preallocated packet buffers"""
+
+    waits = False
+
+    def __init__(self, sock, batch_size=32, buffer_size=2048, timestamps=False):
+        self.sock = sock
+        self.batch_size = batch_size
+        self.buffer_size = buffer_size
+        self._fd = sock.fileno()
+
+        # One contiguous pool, one buffer_size slot per datagram
+        self._pool = bytearray(batch_size * buffer_size)
+        self._pool_view = memoryview(self._pool)
+
+        # Kernel arrival times (integer ns, CLOCK_REALTIME) parallel to the last recv(), or None
+        self.timestamps = None
+        self._control_size = 0
+        if timestamps and sys.platform.startswith('linux'):
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMPNS, 1)
+                self._control_size = socket.CMSG_SPACE(_TIMESPEC.size)
+            except OSError:
+                pass
+        self._control = bytearray(batch_size * self._control_size)
+
+        self._recvmmsg = _load_recvmmsg()
+        if self._recvmmsg is not None:
+            self._init_mmsg()
+
+    @property
+    def batched(self):
+        """True when datagrams are dequeued with recvmmsg"""
+        return self._recvmmsg is not None
+
+    def _init_mmsg(self):
+        """Point one iovec/mmsghdr pair at each pool slot (built once, reused forever)"""
+        self._pool_anchor = ctypes.c_char.from_buffer(self._pool)
+        base = ctypes.addressof(self._pool_anchor)
+
+        self._iovecs = (_IOVec * self.batch_size)()
+        self._msgs = (_MMsgHdr * self.batch_size)()
+        for i in range(self.batch_size):
+            self._iovecs[i].iov_base = base + i * self.buffer_size
+            self._iovecs[i].iov_len = self.buffer_size
+            hdr = self._msgs[i].msg_hdr
+            hdr.msg_iov = ctypes.pointer(self._iovecs[i])
+            hdr.msg_iovlen = 1
+
+        if self._control_size:
+            self._control_anchor = ctypes.c_char.from_buffer(self._control)
+            control_base = ctypes.addressof(self._control_anchor)
+            for i in range(self.batch_size):
+                self._msgs[i].msg_hdr.msg_control = control_base + i * self._control_size
+
+    def recv(self):
+        """Return every datagram currently queued, oldest first
+
+        Returned memoryviews alias the internal pool and are only valid
+        until the next call.
+        """
+        if self._recvmmsg is None:
+            return self._recv_fallback()
+
+        msgs = self._msgs
+        control_size = self._control_size
+        if control_size:
+            # The kernel shrinks msg_controllen to what it wrote; restore it every call
+            for i in range(self.batch_size):
+                msgs[i].msg_hdr.msg_controllen = control_size
+
+        count = self._recvmmsg(self._fd, msgs, self.batch_size, socket.MSG_DONTWAIT, None)
+        if count < 0:
+            err = ctypes.get_errno()
+            if err in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+                return []
+            if err in (errno.ENOSYS, errno.EINVAL):
+                # Kernel/sandbox without recvmmsg (e.g. seccomp-filtered): switch paths for good
+                self._recvmmsg = None
+                return self._recv_fallback()
+            raise OSError(err, os.strerror(err))
+
+        view = self._pool_view
+        size = self.buffer_size
+        if control_size:
+            control = self._control
+            self.timestamps = [_parse_timestamp(control, i * control_size)
+                               if msgs[i].msg_hdr.msg_controllen else None
+                               for i in range(count)]
+        return [view[i * size:i * size + msgs[i].msg_len] for i in range(count)]
+
+    def _recv_fallback(self):
+        """Portable path: one recv_into per datagram, straight into the pool, until the socket would block"""
+        if self._control_size:
+            return self._recvmsg_fallback()
+        packets = []
+        view = self._pool_view
+        size = self.buffer_size
+        recv_into = self.sock.recv_into
+        for i in range(self.batch_size):
+            slot = view[i * size:(i + 1) * size]
+            try:
+                nbytes = recv_into(slot)
+            except (BlockingIOError, InterruptedError, socket.timeout):
+                break
+            packets.append(slot[:nbytes])
+        return packets
+
+    def _recvmsg_fallback(self):
+        """Fallback with kernel timestamps: recvmsg_into per datagram, parsing SCM_TIMESTAMPNS"""
+        packets = []
+        timestamps = []
+        view = self._pool_view
+        size = self.buffer_size
+        for i in range(self.batch_size):
+            slot = view[i * size:(i + 1) * size]
+            try:
+                nbytes, ancdata, _, _ = self.sock.recvmsg_into([slot], self._control_size)
+            except (BlockingIOError, InterruptedError, socket.timeout):
+                break
+            stamp = None
+            for level, kind, data in ancdata:
+                if level == socket.SOL_SOCKET and kind == SO_TIMESTAMPNS and len(data) >= _TIMESPEC.size:
+                    sec, nsec = _TIMESPEC.unpack_from(data)
+                    stamp = sec * 1_000_000_000 + nsec
+            packets.append(slot[:nbytes])
+            timestamps.append(stamp)
+        self.timestamps = timestamps
+        return packets
+
+    def close(self):
+        """Nothing to release; buffers are freed with the object"""
+
+
+class UringReceiver:
+    """Receive a blocking UDP socket through io_uring
+
+    Multishot mode (Linux 6.0+): one IORING_OP_RECV multishot request stays
+    armed and the kernel picks a buffer from a provided-buffer group for each
+    datagram, so steady-state reception needs no per-packet submissions.
+    Older kernels reject it with EINVAL and the receiver falls back to a ring
+    of posted single-shot recvs, one per buffer.
+    """
+
+    waits = True
+    batched = True
+
+    _BUFFER_GROUP = 1
+    _MULTISHOT_TAG = 1 << 62   # user_data of the multishot recv (single-shot recvs use their slot)
+    _PROVIDE_TAG = 1 << 61     # user_data of buffer (re)provision requests
+
+    def __init__(self, sock, queue_depth=256, buffer_size=2048, timeout=0.1, multishot=True):
+        self.sock = sock
+        self._fd = sock.fileno()
+
+        # io_uring arms its own poll for blocking sockets; O_NONBLOCK would
+        # make every posted recv complete immediately with EAGAIN
+        sock.setblocking(True)
+
+        # Room for a full batch of buffer returns plus the re-arm in one submit
+        self._ring = liburing.Ring()
+        liburing.io_uring_queue_init(2 * queue_depth, self._ring)
+        self._cqe = liburing.Cqe()
+        self._timeout = liburing.timespec(timeout)
+
+        # prep_recv takes the receive length from the buffer itself
+        self._buffers = [bytearray(buffer_size) for _ in range(queue_depth)]
+        self._views = [memoryview(buf) for buf in self._buffers]
+        self._consumed = []
+        self._rearm = False
+        self.multishot = multishot
+        if multishot:
+            for slot in range(queue_depth):
+                self._provide(slot)
+            self._arm_multishot()
+        else:
+            for slot in range(queue_depth):
+                self._post(slot)
+
+    def _post(self, slot):
+        """Queue one recv SQE into buffer slot, tagged with its index"""
+        sqe = liburing.io_uring_get_sqe(self._ring)
+        liburing.io_uring_prep_recv(sqe, self._fd, self._buffers[slot])
+        liburing.io_uring_sqe_set_data64(sqe, slot)
+
+    def _provide(self, slot):
+        """Hand buffer slot to the kernel's provided-buffer group as buffer id slot"""
+        sqe = liburing.io_uring_get_sqe(self._ring)
+        liburing.io_uring_prep_provide_buffers(sqe, self._buffers[slot], 1, self._BUFFER_GROUP, slot)
+        liburing.io_uring_sqe_set_data64(sqe, self._PROVIDE_TAG)
+
+    def _arm_multishot(self):
+        """Queue the multishot recv that selects its buffers from the provided group"""
+        sqe = liburing.io_uring_get_sqe(self._ring)
+        liburing.io_uring_prep_recv_multishot(sqe, self._fd)
+        liburing.io_uring_sqe_set_flags(sqe, liburing.IOSQE_BUFFER_SELECT)
+        liburing.io_uring_sqe_set_buf_group(sqe, self._BUFFER_GROUP)
+        liburing.io_uring_sqe_set_data64(sqe, self._MULTISHOT_TAG)
+
+    def recv(self):
+        """Wait up to timeout for completions and return their datagrams in arrival order
+
+        Returned memoryviews stay valid until the next call; their buffers are
+        returned to the kernel only then so it cannot overwrite unread data.
+        """
+        ring = self._ring
+        recycle = self._provide if self.multishot else self._post
+        for slot in self._consumed:
+            recycle(slot)
+        self._consumed = []
+        if self._rearm:
+            # Queued after the buffer returns so the new request finds buffers to select
+            self._arm_multishot()
+            self._rearm = False
+
+        try:
+            liburing.io_uring_submit_and_wait_timeout(ring, self._cqe, 1, self._timeout)
+        except OSError as e:
+            if e.errno not in (errno.ETIME, errno.EINTR):
+                raise
+
+        # CqeIter follows the CQ ring's wrap-around (plain Cqe indexing does not)
+        cqes = self._cqe
+        packets = []
+        ready = 0
+        for _ in liburing.CqeIter(ring, cqes):
+            ready += 1
+            cqe = cqes[0]
+            tag = cqe.user_data
+            if tag == self._PROVIDE_TAG:
+                continue
+            flags = cqe.flags
+            try:
+                size = cqe.res
+            except OSError as e:
+                size = -1  # Failed recv (the bindings raise on a negative res)
+                if tag == self._MULTISHOT_TAG and e.errno == errno.EINVAL:
+                    self._fall_back_to_single_shot()
+                    continue
+            if tag == self._MULTISHOT_TAG:
+                # ENOBUFS (every buffer still unread) or any other stop ends the multishot;
+                # undelivered datagrams stay queued on the socket for the re-armed request
+                if not flags & liburing.IORING_CQE_F_MORE:
+                    self._rearm = self.multishot
+                if not flags & liburing.IORING_CQE_F_BUFFER:
+                    continue
+                slot = flags >> liburing.IORING_CQE_BUFFER_SHIFT
+            else:
+                slot = tag
+            if size >= 0:
+                packets.append(self._views[slot][:size])
+            self._consumed.append(slot)
+        liburing.io_uring_cq_advance(ring, ready)
+        return packets
+
+    def _fall_back_to_single_shot(self):
+        """Kernel without multishot recv: post one plain recv per buffer instead"""
+        print("⚠️ io_uring multishot recv unsupported by this kernel, using single-shot recvs")
+        self.multishot = False
+        # Buffers left in the provided group are never selected without IOSQE_BUFFER_SELECT
+        for slot in range(len(self._buffers)):
+            self._post(slot)
+
+    def close(self):
+        """Tear down the ring (call before closing the socket)"""
+        if self._ring is not None:
+            liburing.io_uring_queue_exit(self._ring)
+            self._ring = None
+
+
+def create_receiver(sock, use_io_uring=False, timestamps=False, batch_size=32):
+    """Pick the fastest receive backend available for sock
+
+    Kernel timestamps need recvmsg, so timestamps=True keeps the recvmmsg backend.
+    """
+    if use_io_uring and timestamps:
+        print("⚠️ Kernel timestamps need recvmmsg; io_uring backend not used")
+    elif use_io_uring and sys.platform.startswith('linux'):
+        if LIBURING_AVAILABLE:
+            try:
+                return UringReceiver(sock)
+            except Exception as e:
+                print(f"⚠️ io_uring unavailable ({e}), falling back to recvmmsg")
+        else:
+            print("⚠️ liburing not installed (pip install liburing), falling back to recvmmsg")
+
+    # Readiness is awaited with select, then the socket is drained in batches
+    sock.setblocking(False)
+    return BatchReceiver(sock, batch_size=batch_size, timestamps=timestamps)